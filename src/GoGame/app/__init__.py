@@ -4,18 +4,62 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
 from flask_bcrypt import Bcrypt
+from app.registry import GameRegistry
+from app.notify import MoveNotifier
+from app.bot import GoBot
+from app.analysis import GameAnalyzer
+from app.hashing import PasswordHasher
+from app.metrics import RequestMetrics
+from app.identity import UserCache
+from app.storage import Storage
 
-app = Flask(__name__)
-app.config.from_object(Config)
-db = SQLAlchemy(app)
-login = LoginManager(app)
-bcrypt = Bcrypt(app)
-csrf = CSRFProtect(app)
-login.login_view = 'login'
+db = SQLAlchemy()
+storage = Storage(db=db)
+login = LoginManager()
+user_cache = UserCache()
+bcrypt = Bcrypt()
+hasher = PasswordHasher(bcrypt=bcrypt)
+csrf = CSRFProtect()
+request_metrics = RequestMetrics()
+registry = GameRegistry()
+notifier = MoveNotifier()
+bot = GoBot()
+analyzer = GameAnalyzer()
+request_metrics.collector(hasher.exposition)
+login.login_view = 'main.login'
 login.refresh_view = 'relogin'
 login.needs_refresh_message = (u"Session timedout, please re-login")
 login.needs_refresh_message_category = "info"
-from app import routes
 
-if __name__ == "__main__":
-    app.run(ssl_context=('cert.pem', 'key.pem'))
+
+def create_app(config_class=Config):
+    """Builds the application without touching the database.
+
+    Extensions only read their settings here; thread pools, process pools
+    and broker connections are started on first use, so the app can be
+    created once and forked into workers. The schema is created or upgraded with
+    ``flask create-schema``.
+    """
+
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    db.init_app(app)
+    storage.init_app(app)
+    login.init_app(app)
+    user_cache.init_app(app)
+    bcrypt.init_app(app)
+    hasher.init_app(app)
+    csrf.init_app(app)
+    request_metrics.init_app(app)
+    registry.init_app(app)
+    notifier.init_app(app)
+    bot.init_app(app)
+    analyzer.init_app(app)
+
+    from app.routes import bp as main_bp
+    from app.api import bp as api_bp
+    from app.commands import bp as commands_bp
+    app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(commands_bp)
+    return app
@@ -0,0 +1,275 @@
+import os
+import random
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from sqlalchemy.exc import IntegrityError
+from app.gameboard import Gameboard, OPPONENT, COLOR_DARK
+from app.mcts import search_worker, apply_move, PASS
+from app.snapshot import dump_board
+
+LOOKUP_BATCH = 500
+
+
+class AnalyzerBusy(Exception):
+    """Raised instead of queueing when the analysis pool already has max_pending games."""
+
+
+class Evaluation:
+    """Area estimate of one position plus the best move found for the side to move."""
+
+    __slots__ = ('dark_area', 'light_area', 'best_move', 'win_rate')
+
+    def __init__(self, dark_area, light_area, best_move=PASS, win_rate=None):
+        self.dark_area = dark_area
+        self.light_area = light_area
+        self.best_move = best_move
+        self.win_rate = win_rate
+
+    def margin(self, komi):
+        """Dark's estimated lead after komi; negative when light is ahead."""
+
+        return self.dark_area - self.light_area - komi
+
+
+class AnalysisJob:
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.total = 0
+        self.done = 0
+        self.positions = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.future.done()
+
+    @property
+    def failed(self):
+        return self.finished and self.future.exception() is not None
+
+
+def replay_positions(size, moves):
+    """Yields (move, board, colour to move) for the empty board and after every move."""
+
+    gameboard = Gameboard.build(size)
+    yield None, gameboard.copy(), COLOR_DARK
+    for x, y, color in moves:
+        apply_move(gameboard, PASS if x is None else (x, y), color)
+        yield (x, y, color), gameboard.copy(), OPPONENT[color]
+
+
+def position_key(gameboard, color):
+    return gameboard.hash, gameboard.size, color
+
+
+class GameAnalyzer:
+    """Evaluates every position of finished games on background pools.
+
+    Each position gets an area estimate of the territory and, when
+    ANALYSIS_PLAYOUTS is above zero, a shallow UCT search for the side to
+    move. Evaluations are memoized by position hash in an LRU of
+    ANALYSIS_CACHE_SIZE positions backed by the PositionEvaluation table,
+    so reopening a game or analyzing games that share an opening only
+    searches positions never seen before. Games are analyzed on a thread
+    pool and the searches run on a process pool; finished analyses of the
+    last ANALYSIS_MAX_GAMES games are kept for the pages polling them.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.playouts = 200
+        self.komi = 6.5
+        self.workers = 2
+        self.processes = None
+        self.max_pending = 16
+        self.max_games = 100
+        self.cache_size = 100000
+        self.cache = OrderedDict()
+        self.jobs = OrderedDict()
+        self.pending = 0
+        self.executor = None
+        self.pool = None
+        self.rng = random.Random()
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.playouts = app.config.get('ANALYSIS_PLAYOUTS', self.playouts)
+        self.komi = app.config.get('KOMI', self.komi)
+        self.workers = app.config.get('ANALYSIS_WORKERS', self.workers)
+        self.processes = app.config.get('ANALYSIS_PROCESSES', self.processes) or os.cpu_count() or 1
+        self.max_pending = app.config.get('ANALYSIS_MAX_PENDING', self.max_pending)
+        self.max_games = app.config.get('ANALYSIS_MAX_GAMES', self.max_games)
+        self.cache_size = app.config.get('ANALYSIS_CACHE_SIZE', self.cache_size)
+        app.extensions['game_analyzer'] = self
+
+    def reset(self):
+        """Forgets pools and jobs inherited from a parent process; pools are recreated on demand."""
+
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.pending = 0
+        self.executor = None
+        self.pool = None
+
+    def analyze(self, game_id):
+        """Returns the analysis job of a game, starting it unless one is running or finished."""
+
+        with self.lock:
+            job = self.jobs.get(game_id)
+            if job is not None and not job.failed:
+                self.jobs.move_to_end(game_id)
+                return job
+            if self.pending >= self.max_pending:
+                raise AnalyzerBusy()
+            self.pending += 1
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='analysis')
+            job = self.jobs[game_id] = AnalysisJob(game_id)
+            self.jobs.move_to_end(game_id)
+            job.future = self.executor.submit(self.__run, job)
+            while len(self.jobs) > self.max_games and next(iter(self.jobs.values())).finished:
+                self.jobs.popitem(last=False)
+        job.future.add_done_callback(self.__release)
+        return job
+
+    def evaluate(self, positions, progress=None):
+        """Evaluates (board, colour to move) pairs, reusing every memoized position.
+
+        progress, when given, is called with the number of positions
+        finished so far.
+        """
+
+        keys = [position_key(gameboard, color) for gameboard, color in positions]
+        evaluations = self.__cached(keys)
+        missing = OrderedDict()
+        for key, position in zip(keys, positions):
+            if key not in evaluations:
+                missing.setdefault(key, position)
+        counts = Counter(keys)
+        done = len(keys) - sum(counts[key] for key in missing)
+        if progress is not None:
+            progress(done)
+
+        if missing:
+            from app.scoring import score_batch
+            scores = score_batch([gameboard for gameboard, _ in missing.values()], self.komi)
+            for key, score in zip(missing, scores):
+                evaluations[key] = Evaluation(score.dark, score.light)
+            for key, best_move, win_rate in self.__search(missing):
+                evaluations[key].best_move = best_move
+                evaluations[key].win_rate = win_rate
+                done += counts[key]
+                if progress is not None:
+                    progress(done)
+            self.__save({key: evaluations[key] for key in missing})
+        if progress is not None:
+            progress(len(keys))
+        return [evaluations[key] for key in keys]
+
+    def __run(self, job):
+        from app.replay import game_moves
+        with self.app.app_context():
+            try:
+                size, moves = game_moves(job.game_id)
+                replayed = list(replay_positions(size, moves))
+                job.total = len(replayed)
+
+                def progress(done):
+                    job.done = done
+
+                evaluations = self.evaluate([(gameboard, color) for _, gameboard, color in replayed], progress)
+                job.positions = [(move, color, evaluation)
+                                 for (move, _, color), evaluation in zip(replayed, evaluations)]
+            except Exception:
+                self.app.logger.exception('analysis: game %s failed', job.game_id)
+                raise
+
+    def __release(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def __search(self, missing):
+        """Runs the shallow search of every missing position, yielding key, best move and win rate."""
+
+        if not self.playouts:
+            return
+        calls = OrderedDict((key, (dump_board(gameboard), list(gameboard.history), color, self.komi,
+                                   self.playouts, None, self.rng.getrandbits(32)))
+                            for key, (gameboard, color) in missing.items())
+        if self.processes == 1:
+            results = ((key, search_worker(*args)) for key, args in calls.items())
+        else:
+            with self.lock:
+                if self.pool is None:
+                    self.pool = ProcessPoolExecutor(self.processes)
+            futures = [(key, self.pool.submit(search_worker, *args)) for key, args in calls.items()]
+            results = ((key, future.result()) for key, future in futures)
+
+        for key, (children, _) in results:
+            move = max(children, key=lambda child: children[child][0]) if children else PASS
+            visits, wins = children.get(move, (0, 0))
+            yield key, move, wins / visits if visits else None
+
+    def __cached(self, keys):
+        """Looks keys up in memory, then in the database; returns the evaluations found."""
+
+        from app import db
+        from app.models import PositionEvaluation
+        found = {}
+        with self.lock:
+            for key in keys:
+                evaluation = self.cache.get(key)
+                if evaluation is not None:
+                    self.cache.move_to_end(key)
+                    found[key] = evaluation
+
+        wanted = {key for key in keys if key not in found}
+        hashes = sorted({key[0] for key in wanted})
+        for start in range(0, len(hashes), LOOKUP_BATCH):
+            rows = db.session.query(PositionEvaluation).filter(
+                PositionEvaluation.position_hash.in_(hashes[start:start + LOOKUP_BATCH]),
+                PositionEvaluation.komi == self.komi,
+                PositionEvaluation.playouts == self.playouts)
+            for row in rows:
+                key = (row.position_hash, row.size, row.color)
+                if key in wanted:
+                    best_move = PASS if row.best_x is None else (row.best_x, row.best_y)
+                    found[key] = Evaluation(row.dark_area, row.light_area, best_move, row.win_rate)
+        self.__remember({key: found[key] for key in wanted if key in found})
+        return found
+
+    def __save(self, evaluations):
+        from app import db
+        from app.models import PositionEvaluation
+        rows = []
+        for (position_hash, size, color), evaluation in evaluations.items():
+            best_x, best_y = (None, None) if evaluation.best_move is PASS else evaluation.best_move
+            rows.append(PositionEvaluation(position_hash=position_hash, size=size, color=color, komi=self.komi,
+                                           playouts=self.playouts, dark_area=evaluation.dark_area,
+                                           light_area=evaluation.light_area, best_x=best_x, best_y=best_y,
+                                           win_rate=evaluation.win_rate))
+        db.session.add_all(rows)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored some of the same positions first; keep the rest.
+            db.session.rollback()
+            for row in rows:
+                db.session.add(row)
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    db.session.rollback()
+        self.__remember(evaluations)
+
+    def __remember(self, evaluations):
+        with self.lock:
+            for key, evaluation in evaluations.items():
+                self.cache[key] = evaluation
+                self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
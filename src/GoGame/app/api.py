@@ -0,0 +1,129 @@
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from app.models import Game
+from app.gameboard import OPPONENT, COLOR_DARK, COLOR_LIGHT
+from app.play import live_board, play_move
+from app.identity import current_player
+from app.analysis import AnalyzerBusy
+from app.mcts import PASS
+from app import analyzer
+
+API_VERSION = 1
+
+bp = Blueprint('api', __name__)
+
+
+def api_error(status, error, **fields):
+    response = jsonify(version=API_VERSION, error=error, **fields)
+    response.status_code = status
+    return response
+
+
+def points(coordinates):
+    return [{'x': x, 'y': y} for x, y in coordinates]
+
+
+def turn(gameboard):
+    return OPPONENT.get(gameboard.last_move, COLOR_DARK)
+
+
+def move_delta(gameboard):
+    """Describes only what the last move changed on the board."""
+
+    placed = []
+    if gameboard.last_placed is not None:
+        x, y = gameboard.last_placed
+        placed.append({'x': x, 'y': y, 'color': gameboard.last_move})
+    return {
+        'version': API_VERSION,
+        'seq': gameboard.move_count,
+        'placed': placed,
+        'captured': points(gameboard.coordinates(gameboard.last_captured)),
+        'last_move': gameboard.last_move,
+        'turn': turn(gameboard),
+    }
+
+
+def board_state(gameboard):
+    return {
+        'version': API_VERSION,
+        'seq': gameboard.move_count,
+        'size': gameboard.size,
+        'last_move': gameboard.last_move,
+        'turn': turn(gameboard),
+        'stones': {color: points(gameboard.coordinates(gameboard.stones[color]))
+                   for color in (COLOR_DARK, COLOR_LIGHT)},
+    }
+
+
+def analysis_state(job, komi):
+    if not job.finished:
+        return {'version': API_VERSION, 'status': 'running', 'done': job.done, 'total': job.total}
+    positions = []
+    for seq, (move, color, evaluation) in enumerate(job.positions):
+        best = evaluation.best_move
+        positions.append({
+            'seq': seq,
+            'move': None if move is None else {'x': move[0], 'y': move[1], 'color': move[2]},
+            'turn': color,
+            'dark': evaluation.dark_area,
+            'light': evaluation.light_area,
+            'margin': evaluation.margin(komi),
+            'best_move': None if best is PASS else {'x': best[0], 'y': best[1]},
+            'win_rate': evaluation.win_rate,
+        })
+    return {'version': API_VERSION, 'status': 'done', 'komi': komi, 'positions': positions}
+
+
+@bp.route('/api/v1/games/<string:gameName>/moves', methods=['POST'])
+def api_move(gameName):
+    if not current_user.is_authenticated:
+        return api_error(401, 'Login required')
+    game = Game.query.filter_by(gamename=gameName).first()
+    if game is None:
+        return api_error(404, 'No such game')
+    payload = request.get_json(silent=True) or {}
+    try:
+        x = int(payload['x'])
+        y = int(payload['y'])
+    except (KeyError, TypeError, ValueError):
+        return api_error(400, 'x and y are required')
+
+    user = current_player()
+    move, delta = play_move(game, user, x, y, move_delta)
+    if not move.result:
+        return api_error(409, move.error, seq=delta['seq'], turn=delta['turn'])
+    return jsonify(delta)
+
+
+@bp.route('/api/v1/games/<string:gameName>/state')
+def api_state(gameName):
+    if not current_user.is_authenticated:
+        return api_error(401, 'Login required')
+    game = Game.query.filter_by(gamename=gameName).first()
+    if game is None:
+        return api_error(404, 'No such game')
+    with live_board(game.id) as gameboard:
+        state = board_state(gameboard)
+    return jsonify(state)
+
+
+@bp.route('/api/v1/games/<string:gameName>/analysis')
+def api_analysis(gameName):
+    if not current_user.is_authenticated:
+        return api_error(401, 'Login required')
+    game = Game.query.filter_by(gamename=gameName).first()
+    if game is None:
+        return api_error(404, 'No such game')
+    if not game.completed:
+        return api_error(409, 'Game is not finished')
+    try:
+        job = analyzer.analyze(game.id)
+    except AnalyzerBusy:
+        return api_error(503, 'Analysis is busy, try again later')
+    if job.failed:
+        return api_error(500, 'Analysis failed')
+    response = jsonify(analysis_state(job, analyzer.komi))
+    if not job.finished:
+        response.status_code = 202
+    return response
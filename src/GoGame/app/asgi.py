@@ -0,0 +1,204 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from app.models import User, Game
+from app.notify import StreamLimitReached, format_event, RELOAD
+
+
+class BoundedExecutor:
+    """Thread pool for blocking database work with a cap on queued calls.
+
+    Callers beyond max_pending wait on the event loop instead of piling up
+    in the pool's unbounded queue.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-db')
+        self.max_pending = max_pending
+        self.semaphore = None
+
+    async def run(self, func, *args):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_pending)
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+
+class AsyncGameServer:
+    """ASGI application serving the game on asyncio.
+
+    /stream is served natively: an open stream is a coroutine waiting on
+    the move notifier, not a thread. Every other route, including /move,
+    /first_move and /update_board, runs the existing Flask view on the
+    bounded executor, so the Gameboard registry, models and templates are
+    shared with the WSGI app, which stays usable on its own.
+
+    Serve it with any ASGI server, e.g. ``uvicorn asgi:application``.
+    """
+
+    def __init__(self, app, notifier):
+        self.app = app
+        self.notifier = notifier
+        self.executor = BoundedExecutor(app.config['ASYNC_DB_WORKERS'], app.config['ASYNC_MAX_PENDING'])
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'].startswith('/stream/'):
+            await self.stream(scope, receive, send)
+        elif scope['type'] == 'http':
+            await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def stream(self, scope, receive, send):
+        # ASGI servers hand over the path already percent-decoded.
+        gameName, _, username = scope['path'][len('/stream/'):].partition('&')
+        game_id = await self.executor.run(self.__find_game, gameName, username)
+        if game_id is None:
+            await self.__respond(send, 404, b'Not Found')
+            return
+
+        loop = asyncio.get_running_loop()
+        inbox = asyncio.Queue(self.app.config['STREAM_QUEUE_SIZE'])
+
+        def deliver(event):
+            loop.call_soon_threadsafe(self.__put, inbox, event)
+
+        try:
+            self.notifier.listen(game_id, deliver, self.__last_event_id(scope))
+        except StreamLimitReached:
+            await self.__respond(send, 503, b'Too many viewers')
+            return
+        disconnected = asyncio.ensure_future(self.__wait_disconnect(receive))
+        keepalive = self.app.config['STREAM_KEEPALIVE_SECONDS']
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'),
+                            (b'cache-control', b'no-cache, no-store, must-revalidate'),
+                            (b'x-content-type-options', b'nosniff')],
+            })
+            while not disconnected.done():
+                getter = asyncio.ensure_future(inbox.get())
+                done, _ = await asyncio.wait({getter, disconnected}, timeout=keepalive,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    chunk = format_event(getter.result())
+                else:
+                    getter.cancel()
+                    if disconnected.done():
+                        break
+                    chunk = ': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+        finally:
+            self.notifier.unlisten(game_id, deliver)
+            disconnected.cancel()
+
+    async def wsgi(self, scope, receive, send):
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        status, headers, content = await self.executor.run(self.__call_wsgi, scope, body)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    def __find_game(self, gameName, username):
+        with self.app.app_context():
+            user = User.query.filter_by(username=username).first()
+            game = Game.query.filter_by(gamename=gameName).first()
+            if user is None or game is None:
+                return None
+            return game.id
+
+    def __call_wsgi(self, scope, body):
+        environ = self.__environ(scope, body)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+            return chunks.append
+
+        chunks = []
+        result = self.app.wsgi_app(environ, start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], b''.join(chunks)
+
+    @staticmethod
+    def __environ(scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope['query_string'].decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = 'HTTP_' + name
+            environ[name] = environ[name] + ',' + value if name in environ else value
+        return environ
+
+    @staticmethod
+    def __put(inbox, event):
+        if inbox.full():
+            while not inbox.empty():
+                inbox.get_nowait()
+            event = RELOAD
+        inbox.put_nowait(event)
+
+    @staticmethod
+    def __last_event_id(scope):
+        for name, value in scope.get('headers', ()):
+            if name == b'last-event-id':
+                return value.decode('latin-1')
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        return query.get('last_event_id', [None])[0]
+
+    @staticmethod
+    async def __wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def __respond(send, status, body):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,57 @@
+def popcount(mask):
+    """Counts set bits of a bitboard."""
+
+    return bin(mask).count('1')
+
+
+def iter_bits(mask):
+    """Yields every set bit of a bitboard as its own single-bit mask."""
+
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+class BoardMasks:
+    """Precomputed edge masks for one board size, shared by every board of that size."""
+
+    _cache = {}
+
+    @classmethod
+    def for_size(cls, size):
+        masks = cls._cache.get(size)
+        if masks is None:
+            masks = cls._cache[size] = BoardMasks(size)
+        return masks
+
+    def __init__(self, size):
+        self.size = size
+        self.full = (1 << size * size) - 1
+        first_col = 0
+        for y in range(size):
+            first_col |= 1 << (y * size)
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << (size - 1))
+        self.adjacent = [self.neighbours(1 << index) for index in range(size * size)]
+        self.adjacent_points = [tuple(bit.bit_length() - 1 for bit in iter_bits(mask))
+                                for mask in self.adjacent]
+
+    def neighbours(self, stones):
+        """Returns the orthogonal neighbours of every stone in the mask."""
+
+        size = self.size
+        return (((stones << 1) & self.not_first_col) |
+                ((stones >> 1) & self.not_last_col) |
+                (stones << size) |
+                (stones >> size)) & self.full
+
+    def flood_fill(self, seed, within):
+        """Grows seed through orthogonally connected points of within."""
+
+        group = seed
+        while True:
+            grown = (group | self.neighbours(group)) & within
+            if grown == group:
+                return group
+            group = grown
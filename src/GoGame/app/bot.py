@@ -0,0 +1,103 @@
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.mcts import MCTSEngine, PASS
+
+
+class GoBot:
+    """Bot player that joins games as a regular User and answers with MCTS.
+
+    A human move schedules the reply on a small thread pool; the search
+    itself runs in the engine's process pool, and the reply goes through the
+    same play_move path as a human's, so it is stored, snapshotted and
+    pushed to streams like any other move.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.engine = None
+        self.executor = None
+        self.username = 'gobot'
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.username = app.config.get('BOT_USERNAME', self.username)
+        app.extensions['go_bot'] = self
+
+    def start(self):
+        """Creates the search engine and reply pool on the first bot move."""
+
+        with self.lock:
+            if self.executor is None:
+                config = self.app.config
+                self.engine = MCTSEngine(playouts=config.get('BOT_PLAYOUTS'),
+                                         time_limit=config.get('BOT_TIME_LIMIT'),
+                                         workers=config.get('BOT_WORKERS'),
+                                         komi=config.get('KOMI', 6.5))
+                self.executor = ThreadPoolExecutor(max_workers=config.get('BOT_MAX_GAMES', 4),
+                                                   thread_name_prefix='gobot')
+
+    def reset(self):
+        """Forgets pools inherited from a parent process; they are recreated on demand."""
+
+        self.lock = threading.Lock()
+        self.engine = None
+        self.executor = None
+
+    def user(self):
+        """Returns the bot's User row, creating it on first use."""
+
+        from app import db
+        from app.models import User
+        user = User.query.filter_by(username=self.username).first()
+        if user is None:
+            user = User(username=self.username, email=self.username + '@bot.invalid')
+            user.set_password(secrets.token_urlsafe(32))
+            db.session.add(user)
+            db.session.commit()
+        return user
+
+    def join(self, game):
+        """Seats the bot as the second player of a game."""
+
+        from app import db
+        from app.models import GameMove
+        user = self.user()
+        game.player2_id = user.id
+        game.player2_name = user.username
+        gm = GameMove(game_id=game.id, turn_player_id=game.player1_id, turn_player_name=game.player1_name,
+                      player_action="StartGame")
+        db.session.add(gm)
+        db.session.commit()
+
+    def is_opponent(self, game, user):
+        return game.player2_name == self.username and user.username != self.username
+
+    def respond(self, game_id):
+        self.start()
+        return self.executor.submit(self.__respond, game_id)
+
+    def __respond(self, game_id):
+        from app.models import Game
+        from app.play import live_board, play_move, player_color
+        with self.app.app_context():
+            try:
+                game = Game.query.get(game_id)
+                user = self.user()
+                color = player_color(game, user)
+                with live_board(game_id) as gameboard:
+                    position = gameboard.copy()
+                result = self.engine.best_move(position, color)
+                self.app.logger.info('gobot: game %s, %d playouts in %.2fs, %.0f playouts/s/core',
+                                     game_id, result.playouts, result.elapsed, result.playouts_per_second_per_core)
+                x, y = (None, None) if result.move is PASS else result.move
+                move, _ = play_move(game, user, x, y, lambda gameboard: None)
+                if not move.result:
+                    self.app.logger.warning('gobot: move rejected in game %s: %s', game_id, move.error)
+                return result
+            except Exception:
+                self.app.logger.exception('gobot: no reply in game %s', game_id)
+                raise
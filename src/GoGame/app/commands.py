@@ -0,0 +1,192 @@
+import time
+import click
+from flask import Blueprint, current_app
+from app import db, leaderboard, schema
+from app.models import User, Game, GameMove, GameRecord, BoardSnapshot, RatingBucket
+from app.movelog import encode_moves, decode_moves, to_sgf, iter_sgf
+from app.replay import load_gameboard, stone_moves, BOARD_SIZE
+from app.ingest import ingest, archive_name, replay_moves
+
+bp = Blueprint('commands', __name__, cli_group=None)
+
+
+@bp.cli.command('rescore')
+@click.option('--komi', type=float, default=None, help='Defaults to the KOMI setting.')
+@click.option('--rules', type=click.Choice(['area', 'territory']), default=None,
+              help='Defaults to the SCORING_RULES setting.')
+@click.option('--batch-size', type=int, default=1000)
+def rescore(komi, rules, batch_size):
+    """Recomputes scores and winners of every completed game."""
+
+    from app.scoring import score_batch
+
+    komi = current_app.config['KOMI'] if komi is None else komi
+    rules = rules or current_app.config['SCORING_RULES']
+    last_id = 0
+    total = 0
+    while True:
+        games = Game.query.filter(Game.completed == 1, Game.id > last_id) \
+            .order_by(Game.id).limit(batch_size).all()
+        if not games:
+            break
+        scores = score_batch([load_gameboard(game.id) for game in games], komi, rules)
+        for game, final in zip(games, scores):
+            game.player1_score = final.dark
+            game.player2_score = final.light
+            game.winner = {'dark': game.player1_name, 'light': game.player2_name}.get(final.winner, "")
+        db.session.commit()
+        total += len(games)
+        last_id = games[-1].id
+        click.echo('Rescored {} games'.format(total))
+
+
+@bp.cli.command('create-schema')
+def create_schema():
+    """Creates missing tables and indexes and adds the columns of older databases."""
+
+    added = schema.upgrade()
+    for table, column in added:
+        click.echo('Added {}.{}'.format(table, column))
+    if ('user', 'rating') in added or (RatingBucket.query.first() is None and User.query.first() is not None):
+        leaderboard.rebuild()
+        click.echo('Counted players per rating')
+    click.echo('Schema is up to date')
+
+
+def completed_batches(batch_size):
+    """Yields completed games in id order, batch_size rows per query."""
+
+    last_id = 0
+    while True:
+        games = Game.query.filter(Game.completed == 1, Game.id > last_id) \
+            .order_by(Game.id).limit(batch_size).all()
+        if not games:
+            return
+        yield games
+        last_id = games[-1].id
+
+
+def game_result(game):
+    """SGF RE value of a completed game, e.g. B+3.5 or W+R."""
+
+    if not game.winner:
+        return '0'
+    margin = abs((game.player1_score or 0) - (game.player2_score or 0) - current_app.config['KOMI'])
+    color = 'B' if game.winner == game.player1_name else 'W'
+    return '{}+{:g}'.format(color, margin) if margin else color + '+R'
+
+
+def row_moves(game_id):
+    return [(gm.x_coor, gm.y_coor, gm.color) for gm in stone_moves(game_id)]
+
+
+@bp.cli.command('compact-games')
+@click.option('--delete-rows', is_flag=True,
+              help='Also delete the GameMove rows and snapshots of compacted games.')
+@click.option('--batch-size', type=int, default=1000)
+def compact_games(delete_rows, batch_size):
+    """Packs the moves of every completed game into one GameRecord blob."""
+
+    total = 0
+    saved = 0
+    for games in completed_batches(batch_size):
+        ids = [game.id for game in games]
+        records = {r.game_id: r for r in GameRecord.query.filter(GameRecord.game_id.in_(ids))}
+        for game in games:
+            record = records.get(game.id)
+            if record is None:
+                moves = row_moves(game.id)
+                record = GameRecord(game_id=game.id, size=BOARD_SIZE, move_count=len(moves),
+                                    moves=encode_moves(BOARD_SIZE, moves), result=game_result(game))
+                db.session.add(record)
+                total += 1
+            if delete_rows and not record.compacted:
+                saved += GameMove.query.filter_by(game_id=game.id).delete(synchronize_session=False)
+                BoardSnapshot.query.filter_by(game_id=game.id).delete(synchronize_session=False)
+                record.compacted = 1
+        db.session.commit()
+    click.echo('Compacted {} games, deleted {} move rows'.format(total, saved))
+
+
+@bp.cli.command('export-sgf')
+@click.argument('out', type=click.File('w'))
+@click.option('--batch-size', type=int, default=1000)
+def export_sgf(out, batch_size):
+    """Writes every completed game to one SGF collection."""
+
+    komi = current_app.config['KOMI']
+    total = 0
+    for games in completed_batches(batch_size):
+        ids = [game.id for game in games]
+        records = {r.game_id: r for r in GameRecord.query.filter(GameRecord.game_id.in_(ids))}
+        for game in games:
+            record = records.get(game.id)
+            if record is None:
+                size, moves = BOARD_SIZE, row_moves(game.id)
+                result = game_result(game)
+            else:
+                (size, moves), result = decode_moves(record.moves), record.result
+            out.write(to_sgf(size, moves, komi, game.player1_name, game.player2_name, result))
+        db.session.expunge_all()
+        total += len(games)
+    click.echo('Exported {} games'.format(total), err=True)
+
+
+@bp.cli.command('import-sgf')
+@click.argument('files', nargs=-1, type=click.File('r'))
+@click.option('--batch-size', type=int, default=1000)
+def import_sgf(files, batch_size):
+    """Stores the legal games of SGF files as completed games with packed records."""
+
+    total = 0
+    for sgf_file in files:
+        for sgf in iter_sgf(sgf_file):
+            if sgf.error is not None:
+                click.echo('Skipped a game of {}: {}'.format(sgf_file.name, sgf.error), err=True)
+                continue
+            played = replay_moves(sgf.size, sgf.moves)
+            if played is None:
+                click.echo('Skipped a game of {}: unsupported size or illegal move'.format(sgf_file.name), err=True)
+                continue
+            black = sgf.get('PB') or 'Black'
+            white = sgf.get('PW') or 'White'
+            result = sgf.get('RE')
+            winner = None
+            if result and result[0] in 'BW':
+                winner = black if result[0] == 'B' else white
+            game = Game(gamename=archive_name(), player1_name=black, player2_name=white,
+                        completed=1, winner=winner)
+            db.session.add(game)
+            db.session.flush()
+            db.session.add(GameRecord(game_id=game.id, size=sgf.size, move_count=len(played),
+                                      moves=encode_moves(sgf.size, [move[:3] for move in played]),
+                                      result=result, compacted=1))
+            total += 1
+            if total % batch_size == 0:
+                db.session.commit()
+                db.session.expunge_all()
+        click.echo('Imported {} games'.format(total))
+    db.session.commit()
+
+
+@bp.cli.command('ingest')
+@click.argument('paths', nargs=-1, type=click.Path(exists=True), required=True)
+@click.option('--rows', 'compact', flag_value=False,
+              help='Store one GameMove row per move instead of a packed GameRecord.')
+@click.option('--compact', 'compact', flag_value=True, default=True)
+@click.option('--workers', type=int, default=None, help='Parser processes; defaults to the CPU count.')
+@click.option('--batch-size', type=int, default=5000, help='Games per insert transaction.')
+@click.option('--progress', type=float, default=2.0, help='Seconds between progress lines.')
+def ingest_archives(paths, compact, workers, batch_size, progress):
+    """Loads directories of SGF files, replaying every game to validate it."""
+
+    last = [time.perf_counter()]
+
+    def report(stats):
+        now = time.perf_counter()
+        if now - last[0] >= progress:
+            last[0] = now
+            click.echo(str(stats))
+
+    stats = ingest(paths, compact, workers, batch_size, report)
+    click.echo(str(stats))
@@ -1,8 +1,16 @@
-from app.piece import Piece, LightPiece, DarkPiece
+import sys
+from app.piece import LightPiece, DarkPiece
 from app.result import Result
+from app.bitboard import BoardMasks, popcount, iter_bits
+from app.groups import GroupTracker
+from app.zobrist import ZobristTable
 COLOR_LIGHT = 'light'
 COLOR_DARK = 'dark'
 
+OPPONENT = {COLOR_DARK: COLOR_LIGHT, COLOR_LIGHT: COLOR_DARK}
+PIECES = {COLOR_DARK: DarkPiece, COLOR_LIGHT: LightPiece}
+
+
 class Gameboard:
     @classmethod
     def build(self, size=9):
@@ -15,86 +23,209 @@ class Gameboard:
     def __generate_board(self, size):
         """Generates inital state of the board with pieces."""
         board=[]
-        for i in range(9):
+        for i in range(size):
              board.append([None]*size)
         return board
 
-    def __init__(self, board, last_move=None):
-        self.board = self.__ensure_valid_board(board)
-        self.size = len(board)
+    @classmethod
+    def from_stones(cls, size, stones, last_move=None, history=None, captures=None, move_count=0):
+        """Builds a board straight from per-colour bitboards."""
+
+        gameboard = cls.__new__(cls)
+        gameboard.__setup(size, stones, last_move, history, captures, move_count)
+        return gameboard
+
+    def __init__(self, board, last_move=None, history=None):
+        board = self.__ensure_valid_board(board)
+        stones = {COLOR_DARK: 0, COLOR_LIGHT: 0}
+        for y, row in enumerate(board):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    stones[piece.color] |= 1 << (y * len(board) + x)
+        self.__setup(len(board), stones, last_move, history)
+
+    def __setup(self, size, stones, last_move, history, captures=None, move_count=0):
+        self.size = size
         self.last_move = last_move
-
-    def move(self, current_position, destination):
-        """Moves piece from current position to destination on the board."""
-
-        cur_x = current_position['x']
-        cur_y = current_position['y']
-        dst_x = destination['x']
-        dst_y = destination['y']
-        if self.last_move == self.board[cur_y][cur_x].color:
+        self.masks = BoardMasks.for_size(size)
+        self.stones = {COLOR_DARK: stones[COLOR_DARK], COLOR_LIGHT: stones[COLOR_LIGHT]}
+        self.captures = dict(captures or {COLOR_DARK: 0, COLOR_LIGHT: 0})
+        self.last_captured = 0
+        self.last_placed = None
+        self.move_count = move_count
+        self.groups = GroupTracker(self.masks)
+        self.groups.rebuild(self.stones)
+        self.zobrist = ZobristTable.for_size(size)
+        self.hash = self.zobrist.position_hash(self.stones)
+        self.history = set(history or ())
+        self.history.add(self.hash)
+
+    def copy(self):
+        """Returns an independent copy of the board, e.g. for search playouts."""
+
+        other = Gameboard.__new__(Gameboard)
+        other.__dict__.update(self.__dict__)
+        other.stones = dict(self.stones)
+        other.captures = dict(self.captures)
+        other.history = set(self.history)
+        other.groups = self.groups.copy()
+        return other
+
+    @property
+    def board(self):
+        """Materializes the bitboards as rows of pieces for rendering."""
+
+        rows = []
+        for y in range(self.size):
+            row = []
+            for x in range(self.size):
+                color = self.color_at(x, y)
+                row.append(PIECES[color]() if color else None)
+            rows.append(row)
+        return rows
+
+    @property
+    def occupied(self):
+        return self.stones[COLOR_DARK] | self.stones[COLOR_LIGHT]
+
+    @property
+    def empty(self):
+        return self.masks.full & ~self.occupied
+
+    def point(self, x, y):
+        """Returns the single-bit mask of the given coordinates."""
+
+        return 1 << (y * self.size + x)
+
+    def coordinates(self, mask):
+        """Returns the (x, y) coordinates of every stone in the mask."""
+
+        return [divmod(bit.bit_length() - 1, self.size)[::-1] for bit in iter_bits(mask)]
+
+    def color_at(self, x, y):
+        bit = self.point(x, y)
+        for color, stones in self.stones.items():
+            if stones & bit:
+                return color
+        return None
+
+    def liberties(self, x, y):
+        """Counts liberties of the group standing on the given point."""
+
+        root = self.groups.root_of(self.point(x, y))
+        if root is None:
+            return 0
+        return popcount(self.groups.liberties[root])
+
+    def move(self, destination, color=None):
+        """Places a stone for the side to move on destination."""
+
+        if color is None:
+            color = OPPONENT.get(self.last_move, COLOR_DARK)
+        return self.place(destination['x'], destination['y'], color)
+
+    def pass_move(self, color, check_turn=True):
+        """Passes the turn without placing a stone."""
+
+        if check_turn and self.last_move == color:
             return Result(False, 'It is not your turn!')
-        dst_is_legal_move = self.__is_legal_move(current_position, destination)
-
-        if dst_is_legal_move and type(self.board[dst_y][dst_x]) not in (LightPiece, DarkPiece):
-            dst_is_last_row_of_board = dst_y in (0, self.size-1)
-            if dst_is_last_row_of_board:
-                self.board[cur_y][cur_x].become_king()
-
-            self.last_move = self.board[cur_y][cur_x].color
-            self.board[cur_y][cur_x], self.board[dst_y][dst_x] = self.board[dst_y][dst_x], self.board[cur_y][cur_x]
-
-            return Result(True)
-        else:
-            return Result(False, 'This move is not possible!')
+        self.last_captured = 0
+        self.last_placed = None
+        self.last_move = color
+        self.move_count += 1
+        return Result(True)
+
+    def is_legal(self, x, y, color):
+        """Checks a move without playing it."""
+
+        return self.__check_move(x, y, color)[0] is None
+
+    def place(self, x, y, color, check_turn=True):
+        """Places a stone, removes captured groups and rejects suicide.
+
+        check_turn=False replays stored moves without enforcing alternation.
+        """
+
+        error, index, roots, captured_roots, position_hash = self.__check_move(x, y, color, check_turn)
+        if error:
+            return Result(False, error)
+
+        groups = self.groups
+        opponent = OPPONENT[color]
+        self.stones[color] |= 1 << index
+        groups.add(index, color, self.empty, roots)
+        captured = 0
+        for root in captured_roots:
+            captured |= groups.stones[root]
+        if captured:
+            self.stones[opponent] &= ~captured
+            occupied = self.occupied
+            for root in captured_roots:
+                groups.remove(root, occupied)
+
+        self.hash = position_hash
+        self.history.add(position_hash)
+        self.captures[color] += popcount(captured)
+        self.last_captured = captured
+        self.last_placed = (x, y)
+        self.last_move = color
+        self.move_count += 1
+        return Result(True)
+
+    def __check_move(self, x, y, color, check_turn=True):
+        """Returns the error of a move, or its point index, adjacent groups, captures and new hash."""
+
+        if not self.__is_move_within_bounds_of_board(x, y):
+            return 'This move is not possible!', None, None, None, None
+        if check_turn and self.last_move == color:
+            return 'It is not your turn!', None, None, None, None
+
+        index = y * self.size + x
+        point = 1 << index
+        occupied = self.stones[COLOR_DARK] | self.stones[COLOR_LIGHT]
+        if occupied & point:
+            return 'This point is already taken!', None, None, None, None
+
+        groups = self.groups
+        breathes = self.masks.adjacent[index] & ~occupied
+        roots = groups.adjacent_roots(index)
+        captured_roots = []
+        for root in roots:
+            liberties = groups.liberties[root]
+            if groups.color[root] == color:
+                if liberties != point:
+                    breathes = True
+            elif liberties == point:
+                captured_roots.append(root)
+
+        if not breathes and not captured_roots:
+            return 'Suicide is not allowed!', None, None, None, None
+
+        zobrist = self.zobrist
+        position_hash = self.hash ^ zobrist.key(color, index)
+        for root in captured_roots:
+            position_hash ^= zobrist.hash_of(groups.stones[root], OPPONENT[color])
+        if position_hash in self.history:
+            return 'This move repeats an earlier position!', None, None, None, None
+        return None, index, roots, captured_roots, position_hash
+
+    def memory_usage(self):
+        """Approximates the bytes held by this board."""
+
+        groups = self.groups
+        total = sys.getsizeof(self) + sys.getsizeof(groups.parent) + sys.getsizeof(self.history)
+        for mapping in (self.stones, groups.stones, groups.liberties, groups.color):
+            total += sys.getsizeof(mapping) + sum(sys.getsizeof(value) for value in mapping.values())
+        return total
 
     def __ensure_valid_board(self, board):
-        """Ensures that board is a square and pieces are set on the black squares."""
+        """Ensures that board is a square."""
 
+        for row in board:
+            if len(row) != len(board):
+                raise ValueError('Board must be a square')
         return board
 
-    def __is_legal_square(self, x, y):
-        """Checks if given square is black."""
-
-        return (y % 2 == 0 and x % 2 == 1) or (y % 2 == 1 and x % 2 == 0)
-
-    def __is_legal_move(self, current_position, destination):
-        """Checks if given move is possible and then performs it."""
-
-        cur_x = current_position['x']
-        cur_y = current_position['y']
-        dst_x = destination['x']
-        dst_y = destination['y']
-
-        if self.__is_move_within_bounds_of_board(dst_x, dst_y):
-            dst_is_white_square = (dst_y % 2 == 0 and dst_x % 2 == 0) or (dst_y % 2 == 1 and dst_x % 2 == 1)
-            if dst_is_white_square:
-                return False
-
-            piece = self.board[cur_y][cur_x]
-            jumping_on_diagonals = abs(dst_x - cur_x) == abs(dst_y - cur_y)
-
-            if dst_x == cur_x-2:
-                if piece.color == COLOR_LIGHT and dst_y == cur_y - 2 and type(self.board[cur_y-1][cur_x-1]) is DarkPiece:
-                    self.board[cur_y-1][cur_x-1] = None
-                    return True
-                if piece.color == COLOR_DARK and dst_y == cur_y + 2 and type(self.board[cur_y+1][cur_x-1]) is LightPiece:
-                    self.board[cur_y+1][cur_x-1] = None
-                    return True
-            elif dst_x == cur_x+2:
-                if piece.color == COLOR_LIGHT and dst_y == cur_y - 2 and type(self.board[cur_y-1][cur_x+1]) is DarkPiece:
-                    self.board[cur_y-1][cur_x+1] = None
-                    return True
-                if piece.color == COLOR_DARK and dst_y == cur_y + 2 and type(self.board[cur_y+1][cur_x+1]) is LightPiece:
-                    self.board[cur_y+1][cur_x+1] = None
-                    return True
-            elif dst_x in (cur_x-1, cur_x+1):
-                if piece.color == COLOR_LIGHT and dst_y == cur_y - 1:
-                    return True
-                if piece.color == COLOR_DARK and dst_y == cur_y + 1:
-                    return True
-
-        return False
-
     def __is_move_within_bounds_of_board(self, dst_x, dst_y):
         """Checks if given move is within bounds of the board."""
 
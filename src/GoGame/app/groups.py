@@ -0,0 +1,131 @@
+from app.bitboard import iter_bits, popcount
+
+EMPTY = -1
+
+
+class GroupTracker:
+    """Union-find over stones with a liberty bitboard per group.
+
+    Every group is represented by its root point index. Placing a stone,
+    merging groups and removing captured groups only touch the groups
+    adjacent to the changed points, so liberty lookups stay constant time
+    however crowded the board is.
+    """
+
+    def __init__(self, masks):
+        self.masks = masks
+        self.parent = [EMPTY] * (masks.size * masks.size)
+        self.stones = {}
+        self.liberties = {}
+        self.color = {}
+
+    def rebuild(self, stones):
+        """Builds every group of a position at once from per-colour bitboards."""
+
+        masks = self.masks
+        empty = masks.full
+        for mask in stones.values():
+            empty &= ~mask
+        parent = self.parent
+        for color, mask in stones.items():
+            while mask:
+                seed = mask & -mask
+                group = masks.flood_fill(seed, mask)
+                root = seed.bit_length() - 1
+                for bit in iter_bits(group):
+                    parent[bit.bit_length() - 1] = root
+                self.stones[root] = group
+                self.liberties[root] = masks.neighbours(group) & empty
+                self.color[root] = color
+                mask &= ~group
+
+    def copy(self):
+        other = GroupTracker.__new__(GroupTracker)
+        other.masks = self.masks
+        other.parent = list(self.parent)
+        other.stones = dict(self.stones)
+        other.liberties = dict(self.liberties)
+        other.color = dict(self.color)
+        return other
+
+    def find(self, index):
+        """Returns the root index of the group containing index."""
+
+        parent = self.parent
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    def root_of(self, bit):
+        index = bit.bit_length() - 1
+        if self.parent[index] == EMPTY:
+            return None
+        return self.find(index)
+
+    def adjacent_roots(self, index):
+        """Returns the distinct groups orthogonally adjacent to a point."""
+
+        parent = self.parent
+        roots = []
+        for neighbour in self.masks.adjacent_points[index]:
+            if parent[neighbour] != EMPTY:
+                root = self.find(neighbour)
+                if root not in roots:
+                    roots.append(root)
+        return roots
+
+    def add(self, index, color, empty, roots=None):
+        """Adds a stone and merges it with adjacent friendly groups.
+
+        empty is the board's empty mask with the new stone already on it,
+        roots the adjacent groups if the caller has looked them up already.
+        """
+
+        point = 1 << index
+        if roots is None:
+            roots = self.adjacent_roots(index)
+        self.parent[index] = index
+        self.stones[index] = point
+        self.liberties[index] = self.masks.adjacent[index] & empty
+        self.color[index] = color
+
+        root = index
+        for neighbour in roots:
+            self.liberties[neighbour] &= ~point
+            if self.color[neighbour] == color:
+                root = self.__union(root, neighbour)
+        return root
+
+    def remove(self, root, occupied):
+        """Removes a captured group and hands its points back as liberties.
+
+        occupied is the board with the captured group already taken off.
+        """
+
+        stones = self.stones.pop(root)
+        del self.liberties[root]
+        del self.color[root]
+        parent = self.parent
+        for bit in iter_bits(stones):
+            parent[bit.bit_length() - 1] = EMPTY
+
+        masks = self.masks
+        seen = []
+        for bit in iter_bits(masks.neighbours(stones) & occupied):
+            neighbour = self.find(bit.bit_length() - 1)
+            if neighbour not in seen:
+                seen.append(neighbour)
+                self.liberties[neighbour] |= masks.neighbours(self.stones[neighbour]) & stones
+        return stones
+
+    def __union(self, a, b):
+        if a == b:
+            return a
+        if popcount(self.stones[a]) < popcount(self.stones[b]):
+            a, b = b, a
+        self.parent[b] = a
+        self.stones[a] |= self.stones.pop(b)
+        self.liberties[a] |= self.liberties.pop(b)
+        del self.color[b]
+        return a
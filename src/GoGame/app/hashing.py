@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.metrics import Histogram, PREFIX
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when the password hashing pool is saturated."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on its own small thread pool, away from the request threads.
+
+    bcrypt releases the GIL while hashing, so a couple of workers keep
+    logins moving while move and stream requests stay responsive. Once
+    max_pending operations are queued or running, new ones fail straight
+    away with HasherBusy rather than waiting for a slot.
+    """
+
+    def __init__(self, app=None, bcrypt=None):
+        self.bcrypt = bcrypt
+        self.rounds = 10
+        self.max_pending = 16
+        self.timeout = None
+        self.workers = 2
+        self.executor = None
+        self.pending = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.histograms = {'hash': Histogram(), 'check': Histogram(), 'wait': Histogram()}
+        if app is not None:
+            self.init_app(app, bcrypt)
+
+    def init_app(self, app, bcrypt=None):
+        self.bcrypt = bcrypt or self.bcrypt
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self.__run('hash', self.bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def check(self, pw_hash, password):
+        return self.__run('check', self.bcrypt.check_password_hash, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """True when a hash was made with a different cost than BCRYPT_LOG_ROUNDS."""
+
+        parts = pw_hash.split('$')
+        return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != self.rounds
+
+    def reset(self):
+        """Forgets a pool inherited from a parent process; it is recreated on demand."""
+
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pending = 0
+
+    def exposition(self):
+        lines = ['# TYPE {}password_seconds histogram'.format(PREFIX)]
+        for name, histogram in sorted(self.histograms.items()):
+            lines += histogram.exposition(PREFIX + 'password_seconds', {'op': name})
+        lines.append('# TYPE {}password_rejected_total counter'.format(PREFIX))
+        lines.append('{}password_rejected_total {}'.format(PREFIX, self.rejected))
+        lines.append('# TYPE {}password_pending gauge'.format(PREFIX))
+        lines.append('{}password_pending {}'.format(PREFIX, self.pending))
+        return lines
+
+    def __run(self, name, func, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusy()
+            self.pending += 1
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        future = self.executor.submit(self.__timed, name, time.perf_counter(), func, *args)
+        future.add_done_callback(self.__release)
+        return future.result(self.timeout)
+
+    def __release(self, future):
+        with self.lock:
+            self.pending -= 1
+
+    def __timed(self, name, submitted, func, *args):
+        start = time.perf_counter()
+        self.histograms['wait'].observe(start - submitted)
+        try:
+            return func(*args)
+        finally:
+            self.histograms[name].observe(time.perf_counter() - start)
@@ -0,0 +1,82 @@
+import threading
+import time
+from flask import abort, request, session
+from flask_login import current_user
+from sqlalchemy.orm import make_transient_to_detached
+
+REFRESHED_KEY = '_refreshed'
+
+
+def refresh_session(app):
+    """Slides the session expiry forward, writing the cookie only when it is due.
+
+    The session is marked modified, and the cookie re-issued, only once
+    SESSION_REFRESH_AFTER has passed since it was last written. Static
+    files and streams never touch the session at all.
+    """
+
+    if request.endpoint in app.config['SESSION_SKIP_ENDPOINTS']:
+        return
+    if not session.permanent:
+        session.permanent = True
+    now = int(time.time())
+    refreshed = session.get(REFRESHED_KEY, 0)
+    if now - refreshed >= app.config['SESSION_REFRESH_AFTER'].total_seconds():
+        session[REFRESHED_KEY] = now
+
+
+def current_player():
+    """The logged-in User row, as already loaded for this request by Flask-Login."""
+
+    if not current_user.is_authenticated:
+        abort(404)
+    return current_user._get_current_object()
+
+
+class UserCache:
+    """Loads users for Flask-Login, optionally caching their rows across requests.
+
+    Flask-Login already keeps the user for the rest of a request. With
+    USER_CACHE_TTL above zero the column values are also kept for that many
+    seconds and attached to the next request's session without a query.
+    Rows are dropped from the cache whenever a User is updated.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 0
+        self.max_size = 10000
+        self.entries = {}
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('USER_CACHE_SIZE', self.max_size)
+        app.extensions['user_cache'] = self
+
+    def load(self, user_id):
+        from app import db
+        from app.models import User
+        user_id = int(user_id)
+        if not self.ttl:
+            return User.query.get(user_id)
+
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            user = User(**entry[1])
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        user = User.query.get(user_id)
+        if user is not None:
+            values = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+            with self.lock:
+                if len(self.entries) >= self.max_size:
+                    self.entries.clear()
+                self.entries[user_id] = (time.monotonic() + self.ttl, values)
+        return user
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
@@ -0,0 +1,177 @@
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from app import db
+from app.models import Game, GameMove, GameRecord
+from app.gameboard import Gameboard, COLOR_DARK
+from app.movelog import encode_moves, iter_sgf
+
+MAX_SIZE = 25
+
+
+def archive_name():
+    return 'sgf' + uuid.uuid4().hex[:12]
+
+
+def find_sgf_files(paths):
+    """Expands files and directories into the .sgf files below them, in sorted order."""
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith('.sgf'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def replay_moves(size, moves):
+    """Plays moves on a fresh board; returns (x, y, color, position_hash) per move or None if one is illegal."""
+
+    if not 2 <= size <= MAX_SIZE:
+        return None
+    gameboard = Gameboard.build(size)
+    played = []
+    for x, y, color in moves:
+        if x is None:
+            move = gameboard.pass_move(color, check_turn=False)
+        else:
+            move = gameboard.place(x, y, color, check_turn=False)
+        if not move.result:
+            return None
+        played.append((x, y, color, gameboard.hash))
+    return played
+
+
+def parse_file(path):
+    """Process pool entry point: parses and validates every game of one SGF file.
+
+    Returns the valid games as (black, white, result, size, moves) tuples
+    and the number of games rejected as unreadable or illegal.
+    """
+
+    games = []
+    rejected = 0
+    try:
+        with open(path, encoding='utf-8', errors='replace') as sgf_file:
+            for sgf in iter_sgf(sgf_file):
+                played = None
+                if sgf.error is None:
+                    try:
+                        played = replay_moves(sgf.size, sgf.moves)
+                    except ValueError:
+                        pass
+                if played is None:
+                    rejected += 1
+                    continue
+                games.append((sgf.get('PB') or 'Black', sgf.get('PW') or 'White', sgf.get('RE'),
+                              sgf.size, played))
+    except (OSError, ValueError):
+        rejected += 1
+    return games, rejected
+
+
+class IngestStats:
+    def __init__(self, files):
+        self.files = files
+        self.files_done = 0
+        self.games = 0
+        self.moves = 0
+        self.rejected = 0
+        self.start = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def __str__(self):
+        elapsed = self.elapsed or 1e-9
+        return '{}/{} files, {} games ({} rejected), {} moves in {:.1f}s: {:.0f} games/s, {:.0f} moves/s'.format(
+            self.files_done, self.files, self.games, self.rejected, self.moves, elapsed,
+            self.games / elapsed, self.moves / elapsed)
+
+
+class Ingester:
+    """Writes parsed games with one executemany per table and one transaction per batch.
+
+    Game ids are handed out from the current maximum so GameMove and
+    GameRecord rows can reference them without a round trip per game; run
+    it while nothing else is creating games.
+    """
+
+    def __init__(self, compact=True, batch_size=5000):
+        self.compact = compact
+        self.batch_size = batch_size
+        self.next_id = (db.session.query(db.func.max(Game.id)).scalar() or 0) + 1
+        self.games = []
+        self.moves = []
+        self.records = []
+
+    def add(self, black, white, result, size, played):
+        game_id = self.next_id
+        self.next_id += 1
+        winner = None
+        if result and result[0] in 'BW':
+            winner = black if result[0] == 'B' else white
+        self.games.append(dict(id=game_id, gamename=archive_name(), player1_name=black, player2_name=white,
+                               completed=1, winner=winner))
+        if self.compact:
+            self.records.append(dict(game_id=game_id, size=size, move_count=len(played), result=result,
+                                     moves=encode_moves(size, [move[:3] for move in played]), compacted=1))
+        else:
+            for seq, (x, y, color, position_hash) in enumerate(played, 1):
+                name = black if color == COLOR_DARK else white
+                self.moves.append(dict(game_id=game_id, turn_player_id=0, turn_player_name=name,
+                                       player_action="Passes" if x is None else "Moves",
+                                       x_coor=x, y_coor=y, color=color, seq=seq, position_hash=position_hash))
+        if len(self.games) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.games:
+            return
+        db.session.execute(Game.__table__.insert(), self.games)
+        if self.records:
+            db.session.execute(GameRecord.__table__.insert(), self.records)
+        if self.moves:
+            db.session.execute(GameMove.__table__.insert(), self.moves)
+        db.session.commit()
+        self.games, self.moves, self.records = [], [], []
+
+
+def ingest(paths, compact=True, workers=None, batch_size=5000, report=None):
+    """Parses SGF files in a process pool and stores the valid games.
+
+    At most a few files per worker are in flight, so memory stays bounded
+    however large the archive is. report is called with the running
+    IngestStats after every file.
+    """
+
+    files = list(find_sgf_files(paths))
+    stats = IngestStats(len(files))
+    ingester = Ingester(compact, batch_size)
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        pending = []
+        remaining = iter(files)
+        while True:
+            for path in remaining:
+                pending.append(pool.submit(parse_file, path))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            games, rejected = pending.pop(0).result()
+            for game in games:
+                ingester.add(*game)
+                stats.moves += len(game[4])
+            stats.games += len(games)
+            stats.rejected += rejected
+            stats.files_done += 1
+            if report is not None:
+                report(stats)
+    ingester.flush()
+    return stats
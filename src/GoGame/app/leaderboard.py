@@ -0,0 +1,131 @@
+from collections import Counter
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import User, RatingBucket
+
+DARK_WIN = 1.0
+DRAW = 0.5
+LIGHT_WIN = 0.0
+
+RESULT_COLUMNS = {DARK_WIN: ('win', 'loss'), DRAW: ('draw', 'draw'), LIGHT_WIN: ('loss', 'win')}
+
+
+def expected_score(rating, opponent):
+    return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400.0))
+
+
+def elo(dark_rating, light_rating, result, k):
+    """Returns both new Elo ratings; result is dark's score, 1 for a win down to 0 for a loss."""
+
+    change = k * (result - expected_score(dark_rating, light_rating))
+    return dark_rating + change, light_rating - change
+
+
+def record_result(dark, light, result):
+    """Updates both players' counts, ratings and rating buckets in the current session without committing.
+
+    The counts are incremented in SQL and flushed first, which locks both
+    rows; the ratings are then read back under that lock, so two games
+    ending at once cannot lose each other's rating changes.
+    """
+
+    for user, column in zip((dark, light), RESULT_COLUMNS[result]):
+        setattr(user, column, getattr(User, column) + 1)
+    db.session.flush()
+    User.query.filter(User.id.in_((dark.id, light.id))).with_for_update().populate_existing().all()
+
+    before = dark.rating, light.rating
+    dark.rating, light.rating = elo(dark.rating, light.rating, result, current_app.config['RATING_K'])
+    connection = db.session.connection()
+    for rating, user in zip(before, (dark, light)):
+        RatingBucket.move(connection, rating, user.rating)
+
+
+def rebuild():
+    """Recounts RatingBucket from every user's rating."""
+
+    counts = Counter(RatingBucket.of(rating) for rating, in db.session.query(User.rating).yield_per(10000))
+    RatingBucket.query.delete()
+    db.session.bulk_insert_mappings(RatingBucket, [{'bucket': bucket, 'players': players}
+                                                   for bucket, players in counts.items()])
+    db.session.commit()
+
+
+def ranking_order():
+    """Best first; ties share a rank and are listed newest first so the (rating, id) index serves both directions."""
+
+    return User.rating.desc(), User.id.desc()
+
+
+def neighbours(user, span, better):
+    """Up to span players next to user in the ranking, nearest first, on the better or the worse side.
+
+    Players tied with the user and the rest are read as two separate index
+    seeks, so a large tie is never scanned.
+    """
+
+    if better:
+        ties = User.query.filter(User.rating == user.rating, User.id > user.id).order_by(User.id)
+        rest = User.query.filter(User.rating > user.rating).order_by(User.rating, User.id)
+    else:
+        ties = User.query.filter(User.rating == user.rating, User.id < user.id).order_by(User.id.desc())
+        rest = User.query.filter(User.rating < user.rating).order_by(*ranking_order())
+    players = ties.limit(span).all()
+    if len(players) < span:
+        players += rest.limit(span - len(players)).all()
+    return players
+
+
+def higher_counts(ratings):
+    """Maps each rating to the number of players rated strictly higher.
+
+    Whole buckets are summed from RatingBucket; players are only counted
+    row by row within a rating's own bucket, so the cost does not grow
+    with the rank.
+    """
+
+    buckets = {RatingBucket.of(rating) for rating in ratings}
+    if not buckets:
+        return {}
+    low, high = min(buckets), max(buckets)
+    above = db.session.query(func.coalesce(func.sum(RatingBucket.players), 0)) \
+        .filter(RatingBucket.bucket > high).scalar()
+    between = dict(db.session.query(RatingBucket.bucket, RatingBucket.players)
+                   .filter(RatingBucket.bucket >= low, RatingBucket.bucket <= high))
+    counts = {}
+    for rating in ratings:
+        bucket = RatingBucket.of(rating)
+        inside = db.session.query(func.count(User.id)) \
+            .filter(User.rating > rating, User.rating < bucket + 1).scalar()
+        counts[rating] = int(above) + sum(n for b, n in between.items() if b > bucket) + inside
+    return counts
+
+
+def rank(user):
+    """1-based rank of a user; players with the same rating share a rank."""
+
+    return higher_counts([user.rating])[user.rating] + 1
+
+
+def top(limit):
+    """Returns (rank, user) pairs for the best rated players."""
+
+    rows = []
+    for i, user in enumerate(User.query.order_by(*ranking_order()).limit(limit)):
+        tied = rows and rows[-1][1].rating == user.rating
+        rows.append((rows[-1][0] if tied else i + 1, user))
+    return rows
+
+
+def around(user, span, position=None):
+    """Returns (rank, user) pairs for up to span players either side of user, user included.
+
+    position is the user's rank when the caller already has it.
+    """
+
+    if position is None:
+        position = rank(user)
+    window = neighbours(user, span, True)[::-1] + [user] + neighbours(user, span, False)
+    counts = higher_counts({other.rating for other in window if other.rating != user.rating})
+    return [(position if other.rating == user.rating else counts[other.rating] + 1, other) for other in window]
@@ -0,0 +1,30 @@
+import importlib
+from app.bitboard import BoardMasks
+from app.zobrist import ZobristTable
+
+PRELOAD_SIZES = (9, 13, 19)
+
+
+def preload(app):
+    """Does the one-off work worth sharing between forked workers.
+
+    Run in the parent before forking: the imported modules, compiled
+    templates and board tables then live in copy-on-write pages every
+    worker shares instead of being rebuilt by each of them.
+    """
+
+    importlib.import_module('app.scoring')
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+    for size in PRELOAD_SIZES:
+        BoardMasks.for_size(size)
+        ZobristTable.for_size(size)
+
+
+def after_fork(app):
+    """Resets every extension holding per-process resources in a new worker."""
+
+    for extension in list(app.extensions.values()):
+        reset = getattr(extension, 'reset', None)
+        if callable(reset):
+            reset()
@@ -0,0 +1,216 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.bitboard import iter_bits, popcount
+from app.gameboard import OPPONENT, COLOR_DARK, COLOR_LIGHT
+from app.snapshot import dump_board, load_board
+
+PASS = None
+EXPLORATION = 1.4
+RANDOM_PROBES = 8
+
+
+def is_own_eye(gameboard, index, color):
+    return not gameboard.masks.adjacent[index] & ~gameboard.stones[color]
+
+
+def candidate_moves(gameboard, color):
+    """Legal moves for color that do not fill one of its own eyes."""
+
+    size = gameboard.size
+    moves = []
+    for bit in iter_bits(gameboard.empty):
+        index = bit.bit_length() - 1
+        y, x = divmod(index, size)
+        if not is_own_eye(gameboard, index, color) and gameboard.is_legal(x, y, color):
+            moves.append((x, y))
+    return moves
+
+
+def random_move(gameboard, color, rng):
+    """Picks a random candidate move, or None when color can only pass.
+
+    A few random probes find a move cheaply on open boards; crowded boards
+    fall back to shuffling the remaining empty points.
+    """
+
+    size = gameboard.size
+    empty = gameboard.empty
+    for _ in range(RANDOM_PROBES):
+        index = rng.randrange(size * size)
+        if empty >> index & 1 and not is_own_eye(gameboard, index, color):
+            y, x = divmod(index, size)
+            if gameboard.is_legal(x, y, color):
+                return x, y
+
+    points = [bit.bit_length() - 1 for bit in iter_bits(empty)]
+    while points:
+        i = rng.randrange(len(points))
+        index = points[i]
+        points[i] = points[-1]
+        points.pop()
+        y, x = divmod(index, size)
+        if not is_own_eye(gameboard, index, color) and gameboard.is_legal(x, y, color):
+            return x, y
+    return PASS
+
+
+def apply_move(gameboard, move, color):
+    if move is PASS:
+        gameboard.pass_move(color, check_turn=False)
+    else:
+        gameboard.place(move[0], move[1], color, check_turn=False)
+
+
+def area_winner(gameboard, komi):
+    """Scores a finished playout: stones plus empty points surrounded by one colour."""
+
+    masks = gameboard.masks
+    dark = gameboard.stones[COLOR_DARK]
+    light = gameboard.stones[COLOR_LIGHT]
+    score = popcount(dark) - popcount(light) - komi
+    for bit in iter_bits(gameboard.empty):
+        adjacent = masks.adjacent[bit.bit_length() - 1]
+        if not adjacent & ~dark:
+            score += 1
+        elif not adjacent & ~light:
+            score -= 1
+    return COLOR_DARK if score > 0 else COLOR_LIGHT
+
+
+def playout(gameboard, color, rng, komi):
+    """Plays random moves until both sides pass and returns the winning colour."""
+
+    passes = 0
+    for _ in range(3 * gameboard.size * gameboard.size):
+        move = random_move(gameboard, color, rng)
+        passes = passes + 1 if move is PASS else 0
+        if passes == 2:
+            break
+        apply_move(gameboard, move, color)
+        color = OPPONENT[color]
+    return area_winner(gameboard, komi)
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'color', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, parent, color, untried):
+        self.move = move
+        self.parent = parent
+        self.color = color
+        self.children = []
+        self.untried = untried or [PASS]
+        self.visits = 0
+        self.wins = 0
+
+    def select(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits +
+                   EXPLORATION * math.sqrt(log_visits / child.visits))
+
+
+def search(gameboard, color, rng, komi, playouts=None, deadline=None):
+    """Runs UCT from gameboard with color to move; returns the root and the playout count."""
+
+    root = Node(None, None, OPPONENT[color], candidate_moves(gameboard, color))
+    count = 0
+    while (playouts is None or count < playouts) and (deadline is None or time.monotonic() < deadline):
+        node = root
+        board = gameboard.copy()
+        while not node.untried and node.children:
+            node = node.select()
+            apply_move(board, node.move, node.color)
+        if node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            mover = OPPONENT[node.color]
+            apply_move(board, move, mover)
+            child = Node(move, node, mover, candidate_moves(board, OPPONENT[mover]))
+            node.children.append(child)
+            node = child
+        winner = playout(board, OPPONENT[node.color], rng, komi)
+        while node is not None:
+            node.visits += 1
+            if winner == node.color:
+                node.wins += 1
+            node = node.parent
+        count += 1
+    return root, count
+
+
+def search_worker(data, history, color, komi, playouts, time_limit, seed):
+    """Process pool entry point: searches a packed board and returns root statistics."""
+
+    gameboard = load_board(data, history=history)
+    deadline = time.monotonic() + time_limit if time_limit else None
+    root, count = search(gameboard, color, random.Random(seed), komi, playouts, deadline)
+    return {child.move: (child.visits, child.wins) for child in root.children}, count
+
+
+class SearchResult:
+    def __init__(self, move, playouts, elapsed, workers, visits):
+        self.move = move
+        self.playouts = playouts
+        self.elapsed = elapsed
+        self.workers = workers
+        self.visits = visits
+
+    @property
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def playouts_per_second_per_core(self):
+        return self.playouts_per_second / self.workers
+
+
+class MCTSEngine:
+    """Root-parallel Monte Carlo tree search over Gameboard.
+
+    Each worker process grows its own UCT tree from the same position and
+    the root visit counts are summed; the most visited move wins. A search
+    stops when either the playout budget or the time limit runs out.
+    """
+
+    def __init__(self, playouts=1000, time_limit=None, workers=None, komi=6.5, seed=None):
+        if playouts is None and time_limit is None:
+            raise ValueError('MCTSEngine needs a playout budget or a time limit')
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.workers = workers or os.cpu_count() or 1
+        self.komi = komi
+        self.rng = random.Random(seed)
+        self.pool = None
+
+    def best_move(self, gameboard, color):
+        data = dump_board(gameboard)
+        history = list(gameboard.history)
+        share = None if self.playouts is None else max(1, self.playouts // self.workers)
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+        args = (data, history, color, self.komi, share, self.time_limit)
+
+        start = time.perf_counter()
+        if self.workers == 1:
+            results = [search_worker(*args, seeds[0])]
+        else:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(self.workers)
+            futures = [self.pool.submit(search_worker, *args, seed) for seed in seeds]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        visits = {}
+        playouts = 0
+        for children, count in results:
+            playouts += count
+            for move, (move_visits, _) in children.items():
+                visits[move] = visits.get(move, 0) + move_visits
+        move = max(visits, key=visits.get) if visits else PASS
+        return SearchResult(move, playouts, elapsed, self.workers, visits)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -0,0 +1,195 @@
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request, has_request_context, Response
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+PREFIX = 'gogame_'
+
+
+class Histogram:
+    """Thread-safe latency histogram with fixed upper bounds in seconds."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self):
+        """Returns (upper bound, observations at or below it) pairs, ending with +Inf."""
+
+        with self.lock:
+            counts = list(self.counts)
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def exposition(self, name, labels=None):
+        """Renders the histogram as Prometheus text exposition lines."""
+
+        labels = labels or {}
+        lines = []
+        for bound, count in self.cumulative():
+            le = '+Inf' if bound == float('inf') else '{:g}'.format(bound)
+            lines.append('{}_bucket{} {}'.format(name, format_labels(dict(labels, le=le)), count))
+        lines.append('{}_sum{} {:.6f}'.format(name, format_labels(labels), self.sum))
+        lines.append('{}_count{} {}'.format(name, format_labels(labels), self.count))
+        return lines
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for key, value in sorted(labels.items())) + '}'
+
+
+@contextmanager
+def phase(name):
+    """Adds the time spent in the block to the named phase of the current request."""
+
+    if not has_request_context() or 'metrics_phases' not in g:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases = g.metrics_phases
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+class TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        with phase('render'):
+            return super().render(*args, **kwargs)
+
+
+class RequestMetrics:
+    """Per-route request timers, per-phase timers and SQL query counts.
+
+    Phases are db (every SQL statement), board (rebuilding a Gameboard),
+    move (Gameboard.place/pass_move) and render (template rendering). They
+    may nest, e.g. board includes the db time of loading its moves. Totals
+    are exported in Prometheus text format at METRICS_PATH, to clients in
+    METRICS_ALLOWED_IPS or sending METRICS_TOKEN as a bearer token.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.requests = {}
+        self.phases = {}
+        self.queries = {}
+        self.collectors = []
+        self.profiler = None
+        self.token = None
+        self.allowed_ips = ()
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.jinja_env.template_class = TimedTemplate
+        if not event.contains(Engine, 'before_cursor_execute', self.before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', self.before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self.after_cursor_execute)
+        app.before_request(self.start_request)
+        app.teardown_request(self.finish_request)
+        if app.config.get('PROFILE_SLOW_REQUESTS'):
+            from app.profiler import SamplingProfiler
+            self.profiler = SamplingProfiler(app.config['PROFILE_SLOW_REQUESTS'],
+                                             app.config.get('PROFILE_INTERVAL', 0.005),
+                                             app.config.get('PROFILE_DIR', 'profiles'))
+        self.token = app.config.get('METRICS_TOKEN')
+        self.allowed_ips = set(app.config.get('METRICS_ALLOWED_IPS', ()))
+        path = app.config.get('METRICS_PATH')
+        if path:
+            app.add_url_rule(path, 'metrics', self.export)
+        app.extensions['request_metrics'] = self
+
+    def collector(self, func):
+        """Registers a function returning extra exposition lines for the export."""
+
+        self.collectors.append(func)
+        return func
+
+    def start_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_phases = {}
+        g.metrics_queries = 0
+        if self.profiler is not None:
+            self.profiler.begin()
+
+    def finish_request(self, exc=None):
+        if 'metrics_start' not in g:
+            return
+        elapsed = time.perf_counter() - g.metrics_start
+        route = request.endpoint or 'unmatched'
+        self.__histogram(self.requests, route).observe(elapsed)
+        self.__histogram(self.queries, route, QUERY_BUCKETS).observe(g.metrics_queries)
+        for name, seconds in g.metrics_phases.items():
+            self.__histogram(self.phases, (route, name)).observe(seconds)
+        if self.profiler is not None:
+            self.profiler.end(route, elapsed)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'metrics_queries' in g:
+            g.metrics_queries += 1
+            g.metrics_query_start = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and g.get('metrics_query_start') is not None:
+            phases = g.metrics_phases
+            phases['db'] = phases.get('db', 0.0) + time.perf_counter() - g.metrics_query_start
+            g.metrics_query_start = None
+
+    def exposition(self):
+        lines = ['# TYPE {}request_seconds histogram'.format(PREFIX)]
+        for route, histogram in sorted(self.requests.items()):
+            lines += histogram.exposition(PREFIX + 'request_seconds', {'route': route})
+        lines.append('# TYPE {}phase_seconds histogram'.format(PREFIX))
+        for (route, name), histogram in sorted(self.phases.items()):
+            lines += histogram.exposition(PREFIX + 'phase_seconds', {'route': route, 'phase': name})
+        lines.append('# TYPE {}sql_queries histogram'.format(PREFIX))
+        for route, histogram in sorted(self.queries.items()):
+            lines += histogram.exposition(PREFIX + 'sql_queries', {'route': route})
+        for collector in self.collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+    def allowed(self):
+        if request.remote_addr in self.allowed_ips:
+            return True
+        auth = request.headers.get('Authorization', '')
+        return bool(self.token) and hmac.compare_digest(auth, 'Bearer ' + self.token)
+
+    def export(self):
+        if not self.allowed():
+            return Response('Forbidden', status=403)
+        return Response(self.exposition(), mimetype='text/plain; version=0.0.4')
+
+    def __histogram(self, table, key, buckets=BUCKETS):
+        histogram = table.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = table.setdefault(key, Histogram(buckets))
+        return histogram
@@ -1,7 +1,9 @@
-from app import db, login, bcrypt
+from app import db, login, hasher, user_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
+import math
+from sqlalchemy import event
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,23 +13,65 @@ class User(UserMixin, db.Model):
     win = db.Column(db.Integer, default=0)
     loss = db.Column(db.Integer, default=0)
     draw = db.Column(db.Integer, default=0)
+    rating = db.Column(db.Float, nullable=False, default=1500.0)
+
+    __table_args__ = (db.Index('ix_user_rating_id', 'rating', 'id'),)
 
     def set_password(self, password):
-        self.password = bcrypt.generate_password_hash(password, 10).decode('utf-8')
+        self.password = hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password, password)
+        return hasher.check(self.password, password)
+
+    def needs_rehash(self):
+        return hasher.needs_rehash(self.password)
 
     def __repr__(self):
         return '<User {}>'.format(self.username)
 
 @login.user_loader
 def load_user(id):
-    return User.query.get(id)
+    return user_cache.load(id)
+
+@event.listens_for(User, 'after_update')
+def forget_user(mapper, connection, user):
+    user_cache.discard(user.id)
+
+@event.listens_for(User, 'after_insert')
+def count_user(mapper, connection, user):
+    RatingBucket.shift(connection, user.rating, 1)
+
+class RatingBucket(db.Model):
+    """Number of players whose rating falls in [bucket, bucket + 1), kept in step with User.rating."""
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    players = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def of(rating):
+        return int(math.floor(rating))
+
+    @classmethod
+    def shift(cls, connection, rating, players):
+        """Adds players, which may be negative, to the bucket of rating within connection's transaction."""
+        table = cls.__table__
+        bucket = cls.of(rating)
+        updated = connection.execute(table.update().where(table.c.bucket == bucket)
+                                     .values(players=table.c.players + players))
+        if not updated.rowcount:
+            connection.execute(table.insert().values(bucket=bucket, players=players))
+
+    @classmethod
+    def move(cls, connection, before, after):
+        if cls.of(before) != cls.of(after):
+            cls.shift(connection, before, -1)
+            cls.shift(connection, after, 1)
+
+    def __repr__(self):
+        return '<Bucket %r: %r players>' % (self.bucket, self.players)
 
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    gamename = db.Column(db.String, nullable=False)
+    gamename = db.Column(db.String, index=True, unique=True, nullable=False)
     player1_name = db.Column(db.String, nullable=False, default="Not Joined Yet")
     player2_name = db.Column(db.String, nullable=False, default="Not Joined Yet")
     player1_id = db.Column(db.Integer)
@@ -37,13 +81,15 @@ class Game(db.Model):
     completed = db.Column(db.Integer, default=0)
     winner = db.Column(db.String)
 
+    __table_args__ = (db.Index('ix_game_completed_id', 'completed', 'id'),)
+
     def __repr__(self):
         return '<Game %r>' % self.id
 
 class GameMove(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, nullable=False)
-    time = db.Column(db.DateTime, default=datetime.utcnow())
+    time = db.Column(db.DateTime, default=datetime.utcnow)
     turn_player_id = db.Column(db.Integer, nullable=False)
     turn_player_name = db.Column(db.String, nullable=False)
     player_action = db.Column(db.String)
@@ -52,6 +98,78 @@ class GameMove(db.Model):
     color = db.Column(db.String)
     player1_move = db.Column(db.String)
     player2_move = db.Column(db.String)
+    position_hash = db.Column(db.BigInteger, index=True)
+    seq = db.Column(db.Integer)  # number of a stone move or pass within its game
+
+    __table_args__ = (db.Index('ix_game_move_game_id_id', 'game_id', 'id'),
+                      db.Index('ix_game_move_game_id_seq', 'game_id', 'seq', unique=True))
+
+    @classmethod
+    def with_position(cls, position_hash):
+        """Finds moves of any game that led to the given position."""
+        return cls.query.filter_by(position_hash=position_hash)
+
+    @classmethod
+    def position_history(cls, game_id):
+        """Returns the hashes of every position reached so far in a game."""
+        rows = db.session.query(cls.position_hash).filter(
+            cls.game_id == game_id, cls.position_hash.isnot(None))
+        return {row.position_hash for row in rows}
+
+    @classmethod
+    def latest_id(cls, game_id):
+        """Id of the last row stored for a game, read from the (game_id, id) index."""
+        return db.session.query(db.func.max(cls.id)).filter(cls.game_id == game_id).scalar()
 
     def __repr__(self):
         return '<Move %r>' % self.id
+
+class BoardSnapshot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, nullable=False)
+    move_id = db.Column(db.Integer, nullable=False)
+    move_count = db.Column(db.Integer, nullable=False)
+    format = db.Column(db.String(16), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+
+    __table_args__ = (db.Index('ix_board_snapshot_game_id_move_id', 'game_id', 'move_id'),)
+
+    @classmethod
+    def latest(cls, game_id):
+        return cls.query.filter_by(game_id=game_id).order_by(cls.move_id.desc()).first()
+
+    def __repr__(self):
+        return '<Snapshot %r of game %r>' % (self.move_count, self.game_id)
+
+class GameRecord(db.Model):
+    """A whole game's moves packed into one blob by app.movelog."""
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.Integer, index=True, unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    move_count = db.Column(db.Integer, nullable=False)
+    moves = db.Column(db.LargeBinary, nullable=False)
+    result = db.Column(db.String)
+    compacted = db.Column(db.Integer, default=0)
+
+    def __repr__(self):
+        return '<Record of game %r>' % self.game_id
+
+class PositionEvaluation(db.Model):
+    """Memoized analysis of one position, shared by every game that reaches it."""
+    id = db.Column(db.Integer, primary_key=True)
+    position_hash = db.Column(db.BigInteger, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    color = db.Column(db.String(8), nullable=False)
+    komi = db.Column(db.Float, nullable=False)
+    playouts = db.Column(db.Integer, nullable=False)
+    dark_area = db.Column(db.Integer, nullable=False)
+    light_area = db.Column(db.Integer, nullable=False)
+    best_x = db.Column(db.Integer)
+    best_y = db.Column(db.Integer)
+    win_rate = db.Column(db.Float)
+
+    __table_args__ = (db.Index('ix_position_evaluation_key', 'position_hash', 'size', 'color', 'komi', 'playouts',
+                               unique=True),)
+
+    def __repr__(self):
+        return '<Evaluation of %r>' % self.position_hash
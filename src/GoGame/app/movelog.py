@@ -0,0 +1,182 @@
+import struct
+from app.gameboard import COLOR_DARK, COLOR_LIGHT
+
+MAGIC = b'GOML'
+VERSION = 1
+HEADER = struct.Struct('<4sBB')
+MOVE = struct.Struct('<H')
+
+LIGHT_BIT = 0x8000
+PASS_CODE = 0x7FFF
+
+SGF_COLORS = {COLOR_DARK: 'B', COLOR_LIGHT: 'W'}
+SGF_PLAYERS = {'B': COLOR_DARK, 'W': COLOR_LIGHT}
+SGF_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+READ_SIZE = 64 * 1024
+
+
+def encode_moves(size, moves):
+    """Packs (x, y, color) moves into a blob of two bytes per move.
+
+    The top bit of each move holds the colour and the rest the point index,
+    or PASS_CODE when x is None.
+    """
+
+    chunks = [HEADER.pack(MAGIC, VERSION, size)]
+    for x, y, color in moves:
+        code = PASS_CODE if x is None else y * size + x
+        if color == COLOR_LIGHT:
+            code |= LIGHT_BIT
+        chunks.append(MOVE.pack(code))
+    return b''.join(chunks)
+
+
+def decode_moves(blob):
+    """Returns the board size and a generator over the (x, y, color) moves of a blob."""
+
+    magic, version, size = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a version {} move log'.format(VERSION))
+
+    def moves():
+        for (code,) in MOVE.iter_unpack(memoryview(blob)[HEADER.size:]):
+            color = COLOR_LIGHT if code & LIGHT_BIT else COLOR_DARK
+            index = code & ~LIGHT_BIT
+            if index == PASS_CODE:
+                yield None, None, color
+            else:
+                yield index % size, index // size, color
+    return size, moves()
+
+
+def sgf_escape(value):
+    return str(value).replace('\\', '\\\\').replace(']', '\\]')
+
+
+def to_sgf(size, moves, komi=None, black=None, white=None, result=None):
+    """Renders one game as an SGF collection of a single main line."""
+
+    parts = ['(;GM[1]FF[4]SZ[{}]'.format(size)]
+    if komi is not None:
+        parts.append('KM[{}]'.format(komi))
+    if black:
+        parts.append('PB[{}]'.format(sgf_escape(black)))
+    if white:
+        parts.append('PW[{}]'.format(sgf_escape(white)))
+    if result:
+        parts.append('RE[{}]'.format(sgf_escape(result)))
+    for x, y, color in moves:
+        point = '' if x is None else SGF_LETTERS[x] + SGF_LETTERS[y]
+        parts.append(';{}[{}]'.format(SGF_COLORS[color], point))
+    parts.append(')\n')
+    return ''.join(parts)
+
+
+class SgfGame:
+    def __init__(self, properties, moves, error=None):
+        self.properties = properties
+        self.moves = moves
+        self.error = error
+
+    @property
+    def size(self):
+        return int(self.properties.get('SZ', 19))
+
+    def get(self, name, default=None):
+        return self.properties.get(name, default)
+
+
+def iter_sgf(stream):
+    """Parses SGF games one at a time from a text stream.
+
+    The stream is read in fixed-size chunks and only the game being parsed
+    is held in memory, so arbitrarily large archives parse in constant
+    memory. Only the main line of each game is kept; side variations are
+    skipped. A game with a malformed move is still yielded, with the
+    problem in its error attribute, and parsing goes on with the next one.
+    """
+
+    depth = 0
+    children = []
+    skip_depth = None
+    properties = {}
+    moves = []
+    name = ''
+    name_closed = False
+    value = None
+    escaped = False
+    error = None
+
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            return
+        for char in chunk:
+            if value is not None:
+                if escaped:
+                    value.append(char)
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == ']':
+                    if skip_depth is None and error is None:
+                        try:
+                            store_property(name, ''.join(value), properties, moves)
+                        except ValueError as exc:
+                            error = str(exc)
+                    value = None
+                    name_closed = True
+                else:
+                    value.append(char)
+            elif char == '[':
+                value = []
+            elif char == '(':
+                depth += 1
+                if depth > 1:
+                    children[-1] += 1
+                    if skip_depth is None and children[-1] > 1:
+                        skip_depth = depth
+                children.append(0)
+            elif char == ')':
+                if depth == 0:
+                    continue
+                if skip_depth == depth:
+                    skip_depth = None
+                children.pop()
+                depth -= 1
+                if depth == 0:
+                    yield SgfGame(properties, moves, error)
+                    properties, moves, error = {}, [], None
+            elif char == ';':
+                name = ''
+                name_closed = False
+            elif char.isupper():
+                if name_closed:
+                    name = ''
+                    name_closed = False
+                name += char
+
+
+def sgf_point(value):
+    if len(value) != 2 or value[0] not in SGF_LETTERS or value[1] not in SGF_LETTERS:
+        raise ValueError('Malformed SGF point [{}]'.format(value))
+    return SGF_LETTERS.index(value[0]), SGF_LETTERS.index(value[1])
+
+
+def store_property(name, value, properties, moves):
+    """Records a move property, or a game property found before the first move.
+
+    Raises ValueError for a move that is not a pass or a two-letter point,
+    and for a board size that is not a single number.
+    """
+
+    if name in SGF_PLAYERS:
+        if value in ('', 'tt'):
+            moves.append((None, None, SGF_PLAYERS[name]))
+        else:
+            x, y = sgf_point(value)
+            moves.append((x, y, SGF_PLAYERS[name]))
+    elif not moves and name not in properties:
+        if name == 'SZ' and not value.isdigit():
+            raise ValueError('Unsupported SGF board size [{}]'.format(value))
+        properties[name] = value
@@ -0,0 +1,276 @@
+import json
+import queue
+import threading
+from collections import defaultdict, deque, OrderedDict
+
+
+class LocalBackend:
+    """Delivers messages to subscribers living in this process only."""
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    def reset(self):
+        """Drops subscribers and locks inherited from a parent process."""
+
+        self.lock = threading.Lock()
+        self.channels = defaultdict(set)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self.lock:
+            callbacks = list(self.channels.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+
+    def subscribe(self, channel, callback):
+        with self.lock:
+            self.channels[channel].add(callback)
+
+    def unsubscribe(self, channel, callback):
+        with self.lock:
+            callbacks = self.channels.get(channel)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self.channels[channel]
+
+
+class RedisBackend(LocalBackend):
+    """Fans messages out through Redis pub/sub so every worker process sees them.
+
+    One listener thread per process receives all game channels and hands
+    them to the local subscribers, so open streams never poll anything.
+    """
+
+    PREFIX = 'gogame:moves:'
+
+    def __init__(self, app):
+        super().__init__()
+        self.url = app.config['NOTIFY_REDIS_URL']
+        self.redis = None
+        self.listener = None
+
+    def start(self):
+        """Connects and starts the listener on first use, in the process that uses it."""
+
+        with self.lock:
+            if self.redis is None:
+                import redis
+                self.redis = redis.Redis.from_url(self.url)
+                self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                self.pubsub.psubscribe(self.PREFIX + '*')
+                self.listener = threading.Thread(target=self.__listen, daemon=True)
+                self.listener.start()
+
+    def reset(self):
+        super().reset()
+        self.redis = None
+        self.listener = None
+
+    def publish(self, channel, message):
+        self.start()
+        self.redis.publish(self.PREFIX + str(channel), message)
+
+    def subscribe(self, channel, callback):
+        self.start()
+        super().subscribe(channel, callback)
+
+    def __listen(self):
+        for item in self.pubsub.listen():
+            channel = item['channel'].decode('utf-8')[len(self.PREFIX):]
+            self.deliver(int(channel), item['data'].decode('utf-8'))
+
+
+BACKENDS = {
+    'local': LocalBackend,
+    'redis': RedisBackend,
+}
+
+
+RELOAD = object()
+
+
+class StreamLimitReached(Exception):
+    """Raised when a game already has as many open streams as allowed."""
+
+
+def event_id_of(message):
+    """SSE id of a message: the move number of a move delta, 'end' for the game over message."""
+
+    if message.startswith('{'):
+        return str(json.loads(message)['seq'])
+    return 'end'
+
+
+def format_event(event):
+    if event is RELOAD:
+        return 'event: reload\ndata: \n\n'
+    event_id, message = event
+    return 'id: {}\ndata: {}\n\n'.format(event_id, message)
+
+
+class GameBroadcast:
+    """Receives each message of one game once and fans it out to every stream.
+
+    The latest messages are kept in a ring buffer so a client reconnecting
+    with its last event id gets exactly what it missed.
+    """
+
+    def __init__(self, game_id, replay_size):
+        self.game_id = game_id
+        self.events = deque(maxlen=replay_size)
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def deliver(self, message):
+        event = (event_id_of(message), message)
+        with self.lock:
+            self.events.append(event)
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            callback(event)
+
+    def missed(self, last_event_id):
+        """Events after last_event_id, or [RELOAD] when the buffer no longer reaches back to it."""
+
+        events = list(self.events)
+        if last_event_id is None or not events:
+            return []
+        for i, (event_id, _) in enumerate(events):
+            if event_id == last_event_id:
+                return events[i + 1:]
+        if events and last_event_id.isdigit() and events[0][0] == str(int(last_event_id) + 1):
+            return events
+        return [RELOAD]
+
+    def add(self, callback, last_event_id, limit):
+        with self.lock:
+            if len(self.subscribers) >= limit:
+                raise StreamLimitReached()
+            self.subscribers.append(callback)
+            for event in self.missed(last_event_id):
+                callback(event)
+
+    def remove(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+
+class Subscription:
+    """Bounded inbox of one stream.
+
+    A stream that falls behind by more than the inbox holds is told to
+    reload instead of silently losing moves.
+    """
+
+    def __init__(self, notifier, channel, maxsize):
+        self.notifier = notifier
+        self.channel = channel
+        self.messages = queue.Queue(maxsize)
+
+    def put(self, event):
+        try:
+            self.messages.put_nowait(event)
+        except queue.Full:
+            while True:
+                try:
+                    self.messages.get_nowait()
+                except queue.Empty:
+                    break
+            self.messages.put_nowait(RELOAD)
+
+    def get(self, timeout=None):
+        """Blocks until an event arrives; returns None when timeout expires first."""
+
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.notifier.unlisten(self.channel, self.put)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MoveNotifier:
+    """Publish/subscribe hub that wakes game streams as soon as a move is committed.
+
+    Each game with streams in this process has one GameBroadcast listening
+    on the backend. Broadcasts of games nobody watches are kept for
+    reconnecting clients, up to STREAM_REPLAY_GAMES of them.
+    """
+
+    def __init__(self, app=None):
+        self.backend = LocalBackend()
+        self.queue_size = 32
+        self.replay_size = 64
+        self.replay_games = 1000
+        self.max_subscribers = 1000
+        self.broadcasts = OrderedDict()
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.backend = BACKENDS[app.config.get('NOTIFY_BACKEND', 'local')](app)
+        self.queue_size = app.config.get('STREAM_QUEUE_SIZE', self.queue_size)
+        self.replay_size = app.config.get('STREAM_REPLAY_SIZE', self.replay_size)
+        self.replay_games = app.config.get('STREAM_REPLAY_GAMES', self.replay_games)
+        self.max_subscribers = app.config.get('STREAM_MAX_SUBSCRIBERS', self.max_subscribers)
+        app.extensions['move_notifier'] = self
+
+    def reset(self):
+        self.backend.reset()
+        self.broadcasts = OrderedDict()
+        self.lock = threading.Lock()
+
+    def publish(self, game_id, message):
+        self.backend.publish(game_id, message)
+
+    def broadcast(self, game_id):
+        with self.lock:
+            broadcast = self.broadcasts.get(game_id)
+            if broadcast is None:
+                broadcast = self.broadcasts[game_id] = GameBroadcast(game_id, self.replay_size)
+                self.backend.subscribe(game_id, broadcast.deliver)
+                self.__evict()
+            else:
+                self.broadcasts.move_to_end(game_id)
+        return broadcast
+
+    def listen(self, game_id, callback, last_event_id=None):
+        """Calls callback with every (event id, message) of the game, starting with those missed since last_event_id.
+
+        Raises StreamLimitReached when the game has STREAM_MAX_SUBSCRIBERS streams already.
+        """
+
+        self.broadcast(game_id).add(callback, last_event_id, self.max_subscribers)
+
+    def unlisten(self, game_id, callback):
+        broadcast = self.broadcasts.get(game_id)
+        if broadcast is not None:
+            broadcast.remove(callback)
+
+    def subscribe(self, game_id, last_event_id=None):
+        subscription = Subscription(self, game_id, self.queue_size)
+        self.listen(game_id, subscription.put, last_event_id)
+        return subscription
+
+    def __evict(self):
+        for game_id in list(self.broadcasts):
+            if len(self.broadcasts) <= self.replay_games:
+                return
+            broadcast = self.broadcasts[game_id]
+            if not broadcast.subscribers:
+                del self.broadcasts[game_id]
+                self.backend.unsubscribe(game_id, broadcast.deliver)
@@ -0,0 +1,47 @@
+class KeysetPage:
+    """One page of a query ordered by a unique key, streamed as rows are fetched.
+
+    The page is selected with ``key > after`` (or ``<`` when descending)
+    rather than an OFFSET, so it costs the same on the first page and the
+    thousandth. One extra row is fetched to learn whether a next page exists;
+    next_cursor is only known once the page has been iterated.
+    """
+
+    def __init__(self, query, column, after=None, limit=50, descending=False, fetch_size=100):
+        if after is not None:
+            query = query.filter(column < after if descending else column > after)
+        self.query = query.order_by(column.desc() if descending else column).limit(limit + 1)
+        self.key = column.key
+        self.limit = limit
+        self.fetch_size = fetch_size
+        self.last = None
+        self.has_more = False
+
+    def __iter__(self):
+        for count, row in enumerate(self.query.yield_per(self.fetch_size)):
+            if count == self.limit:
+                self.has_more = True
+                break
+            self.last = getattr(row, self.key)
+            yield row
+
+    @property
+    def next_cursor(self):
+        return self.last if self.has_more else None
+
+
+class SequencePage:
+    """One page of an in-memory sequence, using the 1-based position of its last row as the cursor."""
+
+    def __init__(self, items, after=None, limit=50):
+        start = after or 0
+        self.rows = items[start:start + limit]
+        self.has_more = len(items) > start + limit
+        self.last = start + len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    @property
+    def next_cursor(self):
+        return self.last if self.has_more else None
@@ -0,0 +1,97 @@
+import json
+from sqlalchemy.exc import IntegrityError
+from app import db, registry, notifier, bot
+from app.models import GameMove
+from app.gameboard import COLOR_DARK, COLOR_LIGHT
+from app.result import Result
+from app.replay import load_gameboard, save_snapshot
+from app.metrics import phase
+
+
+def live_board(game_id):
+    """Checks out the server-side board of a game, reloaded if another worker stored moves since."""
+
+    def loader():
+        with phase('board'):
+            return load_gameboard(game_id)
+    return registry.checkout(game_id, loader, lambda: GameMove.latest_id(game_id))
+
+
+def player_color(game, user):
+    return COLOR_DARK if user.id == game.player1_id else COLOR_LIGHT
+
+
+def move_error(game, user):
+    """Why user may not move in game right now, or None."""
+
+    if user.id not in (game.player1_id, game.player2_id):
+        return 'You are not playing in this game!'
+    if game.player2_id is None:
+        return 'Wait for an opponent to join!'
+    if game.completed:
+        return 'This game is over!'
+    return None
+
+
+MOVE_ATTEMPTS = 3
+
+
+def play_move(game, user, x, y, view):
+    """Applies a move to the server-side board of a game and records it.
+
+    x and y of None pass the turn. view is called with the board while it
+    is still locked and its result is returned next to the move result, so
+    callers read a consistent board. Streams of the game are sent the
+    move's delta, captured points included.
+
+    Each stored move takes the next seq of its game, which is unique. If
+    another worker stored that seq first, the cached board was stale: it
+    is dropped and the move is tried again on the reloaded board.
+    """
+
+    color = player_color(game, user)
+    error = move_error(game, user)
+    for attempt in range(MOVE_ATTEMPTS):
+        with live_board(game.id) as gameboard:
+            with phase('move'):
+                if error:
+                    move = Result(False, error)
+                elif x is None:
+                    move = gameboard.pass_move(color)
+                else:
+                    move = gameboard.place(x, y, color)
+            if not move.result or store_move(game, gameboard, color, x, y):
+                result = move, view(gameboard)
+                break
+    else:
+        with live_board(game.id) as gameboard:
+            move = Result(False, 'The game changed while you moved, please try again!')
+            result = move, view(gameboard)
+    if move.result and bot.is_opponent(game, user):
+        bot.respond(game.id)
+    return result
+
+
+def store_move(game, gameboard, color, x, y):
+    """Records the move just played on gameboard; returns False if its seq was already taken."""
+
+    from app.api import move_delta
+    if color == COLOR_DARK:
+        player_id, player_name = game.player1_id, game.player1_name
+    else:
+        player_id, player_name = game.player2_id, game.player2_name
+    gm = GameMove(game_id=game.id, turn_player_id=player_id, turn_player_name=player_name,
+                  player_action="Passes" if x is None else "Moves", x_coor=x, y_coor=y, color=color,
+                  seq=gameboard.move_count, position_hash=gameboard.hash)
+    db.session.add(gm)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        registry.discard(game.id)
+        return False
+    save_snapshot(game.id, gm.id, gameboard)
+    db.session.commit()
+    registry.advance(game.id, gm.id)
+    notifier.publish(game.id, json.dumps(move_delta(gameboard)))
+    return True
@@ -0,0 +1,62 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Samples the stacks of in-flight requests and keeps those of slow ones.
+
+    A daemon thread looks at every registered request thread each interval
+    seconds. When a request took at least threshold seconds its samples are
+    written to directory in folded format, one "frame;frame;frame count"
+    line per distinct stack, ready for flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, threshold, interval=0.005, directory='profiles'):
+        self.threshold = threshold
+        self.interval = interval
+        self.directory = directory
+        self.active = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def begin(self):
+        with self.lock:
+            self.active[threading.get_ident()] = Counter()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.__sample, name='profiler', daemon=True)
+                self.thread.start()
+
+    def end(self, label, elapsed):
+        with self.lock:
+            samples = self.active.pop(threading.get_ident(), None)
+        if samples and elapsed >= self.threshold:
+            self.dump(label, samples)
+
+    def dump(self, label, samples):
+        os.makedirs(self.directory, exist_ok=True)
+        name = '{}-{}-{}.folded'.format(label, time.strftime('%Y%m%d%H%M%S'), threading.get_ident())
+        with open(os.path.join(self.directory, name), 'w') as out:
+            for stack, count in samples.most_common():
+                out.write('{} {}\n'.format(stack, count))
+
+    def __sample(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, samples in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[folded_stack(frame)] += 1
+
+
+def folded_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append('{} ({})'.format(code.co_name, os.path.basename(code.co_filename)))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
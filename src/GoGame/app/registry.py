@@ -0,0 +1,112 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class _Entry:
+    def __init__(self):
+        self.gameboard = None
+        self.version = None
+        self.lock = threading.RLock()
+        self.nbytes = 0
+
+
+class GameRegistry:
+    """Per-process cache of live Gameboards keyed by game id.
+
+    Requests check a board out, apply their move and check it back in, so
+    the server never rebuilds a board from what the client posted. Games
+    that go idle are evicted least recently used first once either the game
+    count or the estimated memory cap is exceeded; the next request for an
+    evicted game rebuilds it through its loader.
+
+    Other worker processes may store moves the cached board has not seen.
+    A checkout given a version callable, such as the id of the game's
+    latest stored move, reloads the board whenever the stored version no
+    longer matches the one the board was loaded at or advanced to.
+    """
+
+    def __init__(self, app=None):
+        self.games = OrderedDict()
+        self.lock = threading.Lock()
+        self.nbytes = 0
+        self.max_games = 1000
+        self.max_bytes = 64 * 1024 * 1024
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_games = app.config.get('GAME_REGISTRY_MAX_GAMES', self.max_games)
+        self.max_bytes = app.config.get('GAME_REGISTRY_MAX_BYTES', self.max_bytes)
+        app.extensions['game_registry'] = self
+
+    @contextmanager
+    def checkout(self, game_id, loader, version=None):
+        """Yields the live board of a game, loading it on a miss or when its version changed.
+
+        The board is locked for the duration of the block. If the block
+        raises, the board is dropped so the next request reloads it from
+        the database instead of keeping a half-applied move.
+        """
+
+        entry = self.__get(game_id)
+        with entry.lock:
+            current = version() if version is not None else None
+            if entry.gameboard is None or entry.version != current:
+                entry.gameboard = loader()
+                entry.version = current
+            try:
+                yield entry.gameboard
+            except Exception:
+                self.discard(game_id)
+                raise
+            self.__resize(game_id, entry)
+
+    def advance(self, game_id, version):
+        """Records the version a checked-out board reached by storing a move itself."""
+
+        entry = self.games.get(game_id)
+        if entry is not None:
+            entry.version = version
+
+    def discard(self, game_id):
+        with self.lock:
+            entry = self.games.pop(game_id, None)
+            if entry is not None:
+                self.nbytes -= entry.nbytes
+
+    def clear(self):
+        with self.lock:
+            self.games.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self.games)
+
+    def __contains__(self, game_id):
+        return game_id in self.games
+
+    def __get(self, game_id):
+        with self.lock:
+            entry = self.games.get(game_id)
+            if entry is not None:
+                self.games.move_to_end(game_id)
+                return entry
+            entry = self.games[game_id] = _Entry()
+            self.__evict()
+        return entry
+
+    def __resize(self, game_id, entry):
+        nbytes = entry.gameboard.memory_usage()
+        with self.lock:
+            if self.games.get(game_id) is entry:
+                self.nbytes += nbytes - entry.nbytes
+                entry.nbytes = nbytes
+                self.__evict()
+
+    def __evict(self):
+        """Drops least recently used games until both caps hold, keeping the newest."""
+
+        while len(self.games) > 1 and (len(self.games) > self.max_games or self.nbytes > self.max_bytes):
+            _, entry = self.games.popitem(last=False)
+            self.nbytes -= entry.nbytes
@@ -0,0 +1,86 @@
+from collections import namedtuple
+from flask import current_app
+from app import db
+from app.models import GameMove, BoardSnapshot, GameRecord
+from app.gameboard import Gameboard, COLOR_DARK
+from app.snapshot import dump_board, load_board
+from app.movelog import decode_moves
+
+BOARD_SIZE = 9
+
+RecordedMove = namedtuple('RecordedMove', 'turn_player_name x_coor y_coor color player_action time')
+
+
+def stone_moves(game_id, after_id=None):
+    """Returns the stone placements and passes of a game in the order they were played."""
+
+    query = GameMove.query.filter(GameMove.game_id == game_id, GameMove.color.isnot(None))
+    if after_id is not None:
+        query = query.filter(GameMove.id > after_id)
+    return query.order_by(GameMove.id)
+
+
+def load_gameboard(game_id, size=BOARD_SIZE):
+    """Rebuilds the board of a game from its latest snapshot plus the moves after it."""
+
+    record = GameRecord.query.filter_by(game_id=game_id, compacted=1).first()
+    if record is not None:
+        return replay_record(record)
+
+    snapshot = BoardSnapshot.latest(game_id)
+    if snapshot is None:
+        gameboard = Gameboard.build(size)
+        moves = stone_moves(game_id)
+    else:
+        gameboard = load_board(snapshot.data, snapshot.format, GameMove.position_history(game_id))
+        moves = stone_moves(game_id, snapshot.move_id)
+    for gm in moves:
+        if gm.x_coor is None:
+            gameboard.pass_move(gm.color, check_turn=False)
+        else:
+            gameboard.place(gm.x_coor, gm.y_coor, gm.color, check_turn=False)
+    return gameboard
+
+
+def game_moves(game_id, size=BOARD_SIZE):
+    """Returns the board size and every (x, y, color) of a game, compacted or not."""
+
+    record = GameRecord.query.filter_by(game_id=game_id, compacted=1).first()
+    if record is not None:
+        return decode_moves(record.moves)
+    return size, [(gm.x_coor, gm.y_coor, gm.color) for gm in stone_moves(game_id)]
+
+
+def recorded_moves(game, record):
+    """Lists the moves of a compacted game shaped like GameMove rows; their times were not kept."""
+
+    _, moves = decode_moves(record.moves)
+    return [RecordedMove(game.player1_name if color == COLOR_DARK else game.player2_name, x, y, color,
+                         "Passes" if x is None else "Moves", None)
+            for x, y, color in moves]
+
+
+def replay_record(record):
+    """Rebuilds the final board of a game whose move rows were compacted away."""
+
+    size, moves = decode_moves(record.moves)
+    gameboard = Gameboard.build(size)
+    for x, y, color in moves:
+        if x is None:
+            gameboard.pass_move(color, check_turn=False)
+        else:
+            gameboard.place(x, y, color, check_turn=False)
+    return gameboard
+
+
+def save_snapshot(game_id, move_id, gameboard):
+    """Adds a snapshot to the session every SNAPSHOT_INTERVAL moves."""
+
+    interval = current_app.config['SNAPSHOT_INTERVAL']
+    if not interval or gameboard.move_count % interval:
+        return None
+    fmt = current_app.config['SNAPSHOT_FORMAT']
+    snapshot = BoardSnapshot(game_id=game_id, move_id=move_id, move_count=gameboard.move_count,
+                             format=fmt, data=dump_board(gameboard, fmt))
+    db.session.add(snapshot)
+    return snapshot
@@ -1,28 +1,31 @@
-from flask import render_template, redirect, url_for, flash, session, request, jsonify, Response, g
+from flask import Blueprint, current_app, render_template, redirect, url_for, flash, request, jsonify, Response, g, stream_with_context
 from flask_login import current_user, login_user, login_required, logout_user
 from werkzeug.security import check_password_hash
 from werkzeug.urls import url_parse
-from app.models import User, Game, GameMove
+from app.models import User, Game, GameMove, GameRecord
 from app.forms import LoginForm, SignUpForm
-from app.gameboard import Gameboard
-from app.piece import Piece, LightPiece, DarkPiece
+from app.play import live_board, play_move
+from app.piece import Piece
 from app.result import Result
-from datetime import timedelta
-from app import app, db, csrf
-import json, time, re
-
-#db.drop_all()
-db.create_all()
-db.session.commit()
-
-@app.before_request
+from app.pagination import KeysetPage, SequencePage
+from app.replay import recorded_moves
+from app import leaderboard
+from app.hashing import HasherBusy
+from app.analysis import AnalyzerBusy
+from app.identity import refresh_session, current_player
+from app.notify import StreamLimitReached, format_event
+from concurrent.futures import TimeoutError as HashTimeout
+from app import db, csrf, notifier, bot, storage, analyzer
+import json, re
+
+bp = Blueprint('main', __name__)
+
+@bp.before_app_request
 def before_request():
-    session.permanent = True
-    app.permanent_session_lifetime = timedelta(minutes=2)
-    session.modified = True
+    refresh_session(current_app)
     g.user = current_user
 
-@app.after_request
+@bp.after_app_request
 def apply_caching(response):
     response.headers["X-Frame-Options"] = "DENY"
     response.headers['X-XSS-Protection'] = '1; mode=block'
@@ -31,45 +34,57 @@ def apply_caching(response):
     response.headers["Pragma"] = "no-cache"
     return response
 
-@app.route('/')
-@app.route("/index")
-@app.route("/home")
+@bp.route('/')
+@bp.route("/index")
+@bp.route("/home")
 @login_required
 def index():
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
-    user = User.query.filter_by(username=current_user.username).first_or_404()
-    users = User.query.all()
-    return render_template('index.html', title='Home', user=user, users=users)
+        return redirect(url_for('main.login'))
+    user = current_player()
+    leaders = leaderboard.top(current_app.config['LEADERBOARD_SIZE'])
+    rank = leaderboard.rank(user)
+    if any(leader.id == user.id for _, leader in leaders):
+        nearby = []
+    else:
+        nearby = leaderboard.around(user, current_app.config['LEADERBOARD_SPAN'], rank)
+    return render_template('index.html', title='Home', user=user, rank=rank, leaders=leaders, nearby=nearby)
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     logout_user()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route("/login", methods=['GET','POST'])
+@bp.route("/login", methods=['GET','POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
 
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter(User.username == form.username.data).first()
-        if user is None or not user.check_password(form.password.data):
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+            if valid and user.needs_rehash():
+                user.set_password(form.password.data)
+                db.session.commit()
+        except (HasherBusy, HashTimeout):
+            return __auth_busy('login.html', 'Login', form)
+        if not valid:
             flash('Invalid username or password', 'error')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
 
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         if not next_page or url_parse(next_page).netloc != '':
-            next_page = url_for('index')
+            next_page = url_for('main.index')
         return redirect(next_page)
     return render_template('login.html', title='Login', form=form)
 
-@app.route('/signup', methods=('GET', 'POST'))
+@bp.route('/signup', methods=('GET', 'POST'))
 def signup():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     form = SignUpForm()
     if form.validate_on_submit():
         username_re_match =  re.fullmatch("^(?!.*[-_]{2,})(?=^[^-_].*[^-_]$)[\w\s-]{5,8}$", form.username.data)
@@ -78,30 +93,44 @@ def signup():
             flash("Username must contain a length of at least 5 characters and a maximum of 8 characters."
             "Username must contain at least one special character like - or _. "
             "Username must not start or end with these special characters and they can't be one after", 'error')
-            return redirect(url_for('signup'))
+            return redirect(url_for('main.signup'))
         if not bool(password_re_match):
             flash("Password must contain a length of at least 8 characters and a maximum of 15 characters."
             "Password must contain at least one lowercase character"
             "Password must contain at least one uppercase character"
             "Password must contain at least one digit [0-9]."
             "Password must contain at least one special character like ! @ # & $ %.", 'error')
-            return redirect(url_for('signup'))
+            return redirect(url_for('main.signup'))
         user = User(username=form.username.data, email=form.email.data, password=form.password.data)
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except (HasherBusy, HashTimeout):
+            return __auth_busy('signup.html', 'Sign Up', form)
         db.session.add(user)
         db.session.commit()
         flash("You are successfully registered!", "success")
-        return redirect(url_for("login"))
+        return redirect(url_for("main.login"))
     return render_template('signup.html', title='Sign Up', form=form)
 
-@app.route("/create_game", methods=['POST'])
+def __auth_busy(template_name, title, form):
+    """Turns a saturated password hashing pool into a quick 503 instead of a queued request."""
+
+    flash('The server is busy, please try again in a few seconds.', 'error')
+    response = Response(render_template(template_name, title=title, form=form), status=503)
+    response.headers['Retry-After'] = '5'
+    return response
+
+@bp.route("/create_game", methods=['POST'])
 def create_game():
     gameName = request.form.get('gamename')
     gameName_re_match = re.match("^[A-Za-z0-9]{5,10}$",gameName)
     if not bool(gameName_re_match):
         flash("GameName must contain a length of at least 5 characters and a maximum of 10 characters.", 'error')
-        return redirect(url_for('index'))
-    user = User.query.filter_by(username=current_user.username).first_or_404()
+        return redirect(url_for('main.index'))
+    if Game.query.filter_by(gamename=gameName).first() is not None:
+        flash("GameName already exists.", 'error')
+        return redirect(url_for('main.index'))
+    user = current_player()
     game = Game(gamename=gameName, player1_id=user.id, player1_name=user.username, winner="")
     db.session.add(game)
     db.session.commit()
@@ -109,37 +138,66 @@ def create_game():
     gm = GameMove(game_id=game.id, turn_player_id=game.player1_id, turn_player_name=game.player1_name, player_action="Created")
     db.session.add(gm)
     db.session.commit()
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route("/games")
+@bp.route("/games")
 def games():
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
-    games = [game for game in Game.query.all()]
+        return redirect(url_for('main.login'))
+    games = KeysetPage(storage.query(Game).filter_by(completed=0), Game.id,
+                       after=request.args.get('after', type=int), limit=current_app.config['GAMES_PAGE_SIZE'])
     return render_template("games.html", games=games)
 
-@app.route("/show_moves/<string:gamename>")
+@bp.route("/show_moves/<string:gamename>")
 def show_moves(gamename):
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
-    game = Game.query.filter_by(gamename=gamename).first()
-    gameMoves = GameMove.query.all()
-    return render_template('moves.html', title='Moves', game=game, gameMoves=gameMoves)
+        return redirect(url_for('main.login'))
+    game = storage.query(Game).filter_by(gamename=gamename).first_or_404()
+    after = request.args.get('after', type=int)
+    limit = current_app.config['MOVES_PAGE_SIZE']
+    record = storage.query(GameRecord).filter_by(game_id=game.id, compacted=1).first()
+    if record is not None:
+        gameMoves = SequencePage(recorded_moves(game, record), after=after, limit=limit)
+    else:
+        gameMoves = KeysetPage(storage.query(GameMove).filter_by(game_id=game.id), GameMove.id,
+                               after=after, limit=limit)
+    return Response(__stream_template('moves.html', title='Moves', game=game, gameMoves=gameMoves))
 
-@app.route("/completed_games")
+@bp.route("/analysis/<string:gamename>")
+def analysis(gamename):
+    if not current_user.is_authenticated:
+        return redirect(url_for('main.login'))
+    game = storage.query(Game).filter_by(gamename=gamename, completed=1).first_or_404()
+    try:
+        job = analyzer.analyze(game.id)
+    except AnalyzerBusy:
+        response = Response('The analysis pool is busy, please try again in a few seconds.', status=503)
+        response.headers['Retry-After'] = '5'
+        return response
+    return render_template('analysis.html', title='Analysis', game=game, job=job, komi=analyzer.komi)
+
+@bp.route("/completed_games")
 def completed_games():
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
-    games = Game.query.filter_by(completed=1).all()
-    return render_template('game_moves.html', title='Completed Games', games=games)
+        return redirect(url_for('main.login'))
+    games = KeysetPage(storage.query(Game).filter_by(completed=1), Game.id,
+                       after=request.args.get('after', type=int), limit=current_app.config['GAMES_PAGE_SIZE'])
+    return Response(__stream_template('game_moves.html', title='Completed Games', games=games))
+
+def __stream_template(template_name, **context):
+    """Renders a template chunk by chunk so long pages go out as rows are read."""
+
+    current_app.update_template_context(context)
+    template = current_app.jinja_env.get_template(template_name)
+    return stream_with_context(template.generate(context))
 
-@app.route("/join_game/<string:gameName>", methods=["GET","POST"])
+@bp.route("/join_game/<string:gameName>", methods=["GET","POST"])
 @csrf.exempt
 def join_game(gameName):
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     game = Game.query.filter_by(gamename=gameName).first()
-    user = User.query.filter_by(username=current_user.username).first_or_404()
+    user = current_player()
     if game.player1_id == user.id:
             pass
     else:
@@ -148,163 +206,128 @@ def join_game(gameName):
         gm = GameMove(game_id=game.id, turn_player_id=game.player1_id, turn_player_name=game.player1_name, player_action="StartGame")
         db.session.add(gm)
         db.session.commit()
-    gameboard = Gameboard.build(9)
-    board = gameboard.board
-    return render_template('play.html', board=board, user=user, gamename=game.gamename)
+    with live_board(game.id) as gameboard:
+        board = gameboard.board
+        last_move = gameboard.last_move
+        seq = gameboard.move_count
+    return render_template('play.html', board=board, user=user, last_move=last_move, seq=seq, gamename=game.gamename)
 
-@app.route('/move', methods=["POST"])
+@bp.route("/add_bot/<string:gameName>", methods=["POST"])
+def add_bot(gameName):
+    if not current_user.is_authenticated:
+        return redirect(url_for('main.login'))
+    game = Game.query.filter_by(gamename=gameName).first_or_404()
+    user = current_player()
+    if game.player1_id != user.id or game.player2_id is not None:
+        flash("Only the creator of a game without an opponent can invite the bot.", 'error')
+        return redirect(url_for('main.games'))
+    bot.join(game)
+    return redirect(url_for('main.join_game', gameName=game.gamename))
+
+@bp.route('/move', methods=["POST"])
 def move():
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     if request.method == 'POST':
-        gameboard = Gameboard(__prepare_board(request), request.form['last_move'])
-
-        current_position = {
-            'x': int(request.form['cur_x']),
-            'y': int(request.form['cur_y'])
-        }
-        destination = {
-            'x': int(request.form['dst_x']),
-            'y': int(request.form['dst_y'])
-        }
-        move = gameboard.move(current_position, destination)
-
-        board = gameboard.board
-        last_move = gameboard.last_move
-        return render_template('_gameboard.html', board=board, last_move=last_move, move_result=move.result, move_error=move.error)
-
-@app.route('/first_move/<string:gameName>', methods=["POST"])
+        user = current_player()
+        game = Game.query.filter_by(gamename=request.form['gamename']).first_or_404()
+        x = int(request.form['dst_x'])
+        y = int(request.form['dst_y'])
+        move, (board, last_move, seq) = play_move(game, user, x, y, __board_view)
+        return render_template('_gameboard.html', board=board, last_move=last_move, seq=seq, gamename=game.gamename,
+        move_result=move.result, move_error=move.error)
+
+@bp.route('/first_move/<string:gameName>', methods=["POST"])
 @csrf.exempt
 def first_move(gameName):
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     if request.method == 'POST':
-        user = User.query.filter_by(username=current_user.username).first_or_404()
+        user = current_player()
         game = Game.query.filter_by(gamename=gameName).first()
-        gameboard = Gameboard(__prepare_board(request), request.form['last_move'])
-        board = gameboard.board
         x = int(request.form['x'])
         y = int(request.form['y'])
-        if(user.username == game.player1_name):
-            board[y][x] = DarkPiece()
-            last_move = 'dark'
-            gm = GameMove(game_id=game.id, turn_player_id=game.player1_id, turn_player_name=game.player1_name,
-            player_action="Moves",x_coor = x, y_coor = y, color = "dark")
-        else:
-            board[y][x] = LightPiece()
-            last_move = 'light'
-            gm = GameMove(game_id=game.id, turn_player_id=game.player2_id, turn_player_name=game.player2_name,
-            player_action="Moves",x_coor = x, y_coor = y, color = "light")
-        db.session.add(gm)
-        db.session.commit()
-        return render_template('play.html', board=board, user=user, last_move=last_move, gamename=game.gamename)
+        move, (board, last_move, seq) = play_move(game, user, x, y, __board_view)
+        return render_template('play.html', board=board, user=user, last_move=last_move, seq=seq, gamename=game.gamename,
+        move_result=move.result, move_error=move.error)
 
-@app.route('/update_board/<string:gameName>', methods=["POST"])
+@bp.route('/update_board/<string:gameName>', methods=["POST"])
 @csrf.exempt
 def update_board(gameName):
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     if request.method == 'POST':
-        user = User.query.filter_by(username=current_user.username).first_or_404()
+        user = current_player()
         game = Game.query.filter_by(gamename=gameName).first()
-        game_moves = GameMove.query.filter_by(game_id=game.id).order_by(GameMove.id.desc())
-
-        this_game_moves = [gm for gm in game_moves if gm.x_coor != None]
-        gameboard = __prepare_updated_board(this_game_moves)
-        if(user.username == game.player1_name):
-            last_move = 'dark'
-        else:
-            last_move = 'light'
-        return render_template('play.html', board=gameboard, user=user, last_move=last_move, gamename=game.gamename)
-
-def __prepare_board(request):
-    board_size = 9
-    pieces_count = int(request.form['pieces_count'])
-    prepared_board = __generate_empty_board(board_size)
-
-    for i in range(pieces_count):
-        x = int(request.form['pieces['+str(i)+'][x]'])
-        y = int(request.form['pieces['+str(i)+'][y]'])
-        color = request.form['pieces['+str(i)+'][color]']
-
-        if color == 'DarkPiece':
-            prepared_piece = DarkPiece()
-        if color == 'LightPiece':
-            prepared_piece = LightPiece()
-
-        prepared_board[y][x] = prepared_piece
-
-    return prepared_board
-
-def __prepare_updated_board(moves):
-    board_size = 9
-    #pieces_count = int(request.form['pieces_count'])
-    prepared_board = __generate_empty_board(board_size)
-
-    for mv in moves:
-        x = mv.x_coor
-        y = mv.y_coor
-        color = mv.color
-
-        if color == 'dark':
-            prepared_piece = DarkPiece()
-        if color == 'light':
-            prepared_piece = LightPiece()
+        with live_board(game.id) as gameboard:
+            board = gameboard.board
+            last_move = gameboard.last_move
+            seq = gameboard.move_count
+        return render_template('play.html', board=board, user=user, last_move=last_move, seq=seq, gamename=game.gamename)
 
-        prepared_board[y][x] = prepared_piece
+def __board_view(gameboard):
+    return gameboard.board, gameboard.last_move, gameboard.move_count
 
-    return prepared_board
-
-def __generate_empty_board(size):
-    board = []
-
-    for i in range(size):
-        board.append([None]*size)
-
-    return board
-
-@app.route('/stream/<string:params>',methods=["GET","POST"])
+@bp.route('/stream/<string:params>',methods=["GET","POST"])
 def stream(params):
     gameName, username = params.split("&")
     user = User.query.filter_by(username= username).first_or_404()
-    game = Game.query.filter_by(gamename=gameName).first()
-
-    def event_stream(game, user):
+    game = Game.query.filter_by(gamename=gameName).first_or_404()
+    keepalive = current_app.config['STREAM_KEEPALIVE_SECONDS']
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        subscription = notifier.subscribe(game.id, last_event_id)
+    except StreamLimitReached:
+        return Response('Too many viewers', status=503, headers={'Retry-After': '10'})
+
+    def event_stream():
         while True:
-            yield 'data: {}\n\n'.format(detect_move(game, user))
-    return Response(event_stream(game, user), mimetype="text/event-stream")
-
-def detect_move(game, user):
-    time.sleep(10)
-    gm = GameMove.query.filter_by(game_id=game.id).order_by(GameMove.id.desc()).first()
-    return "Waiting" + ";" + str(gm.color)
+            event = subscription.get(timeout=keepalive)
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                yield format_event(event)
+    response = Response(event_stream(), mimetype="text/event-stream")
+    response.call_on_close(subscription.close)
+    return response
 
-@app.route("/stop_game/<string:gameName>", methods=["POST"])
+@bp.route("/stop_game/<string:gameName>", methods=["POST"])
 @csrf.exempt
 def stop_game(gameName):
     if not current_user.is_authenticated:
-        return redirect(url_for('login'))
-    game = Game.query.filter_by(gamename=gameName).first()
-    user = User.query.filter_by(username=current_user.username).first_or_404()
-    light_pieces = request.form['light_pieces']
-    dark_pieces = request.form['dark_pieces']
-    if(light_pieces > dark_pieces):
-        game.completed = 1
-        game.player2_score = light_pieces
-        game.player1_score = dark_pieces
+        return redirect(url_for('main.login'))
+    game = Game.query.filter_by(gamename=gameName).first_or_404()
+    user = current_player()
+    if user.id not in (game.player1_id, game.player2_id):
+        flash("Only the players can stop a game!", "error")
+        return redirect(url_for('main.index'))
+    if game.completed:
+        flash("Game is already over!", "error")
+        return redirect(url_for('main.index'))
+    from app.scoring import score
+    with live_board(game.id) as gameboard:
+        final = score(gameboard, current_app.config['KOMI'], current_app.config['SCORING_RULES'])
+    game.completed = 1
+    game.player1_score = final.dark
+    game.player2_score = final.light
+    if final.winner == 'light':
         game.winner = game.player2_name
         gmove = GameMove(game_id=game.id, turn_player_id=game.player2_id, turn_player_name=game.player2_name, player_action="Gameover")
-        user_player = User.query.filter_by(id=game.player2_id).first_or_404()
-        user_player.win = 1
+        result = leaderboard.LIGHT_WIN
+    elif final.winner == 'dark':
+        game.winner = game.player1_name
+        gmove = GameMove(game_id=game.id, turn_player_id=game.player1_id, turn_player_name=game.player1_name, player_action="Gameover")
+        result = leaderboard.DARK_WIN
     else:
-        game.completed=1
-        game.player1_score=dark_pieces
-        game.player2_score = light_pieces
-        game.winner=game.player1_name
+        game.winner = ""
         gmove = GameMove(game_id=game.id, turn_player_id=game.player1_id, turn_player_name=game.player1_name, player_action="Gameover")
-        user_player = User.query.filter_by(id=game.player1_id).first_or_404()
-        user_player.win = 1
+        result = leaderboard.DRAW
+    dark_player = User.query.get(game.player1_id) if game.player1_id else None
+    light_player = User.query.get(game.player2_id) if game.player2_id else None
+    if dark_player and light_player and dark_player.id != light_player.id:
+        leaderboard.record_result(dark_player, light_player, result)
     flash("Game is stopped!", "success")
     db.session.add(gmove)
     db.session.commit()
-    return redirect(url_for('index'))
+    notifier.publish(game.id, "Gameover;{}".format(game.winner))
+    return redirect(url_for('main.index'))
@@ -0,0 +1,54 @@
+from sqlalchemy import inspect
+from app import db
+
+# Columns added to tables that already existed in deployed databases.
+# create_all only creates missing tables, so each of these is added with an
+# explicit ALTER TABLE, then filled in for the rows already stored by its
+# default or backfill statement.
+ADDED_COLUMNS = [
+    ('game_move', 'position_hash', 'BIGINT', None),
+    ('user', 'rating', 'FLOAT NOT NULL DEFAULT 1500.0', None),
+    ('game_move', 'seq', 'INTEGER',
+     'UPDATE game_move SET seq = (SELECT COUNT(*) FROM game_move AS earlier '
+     'WHERE earlier.game_id = game_move.game_id AND earlier.color IS NOT NULL AND earlier.id <= game_move.id) '
+     'WHERE color IS NOT NULL'),
+]
+
+
+def upgrade():
+    """Brings the database up to the models; returns the (table, column) pairs it had to add.
+
+    Missing tables are created, missing columns are added from
+    ADDED_COLUMNS and missing indexes are created on every table. Games
+    sharing a name are renamed before gamename gets its unique index.
+    """
+
+    engine = db.engine
+    db.create_all()
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    added = []
+    with engine.begin() as connection:
+        for table, column, ddl, backfill in ADDED_COLUMNS:
+            if column not in {c['name'] for c in inspector.get_columns(table)}:
+                connection.execute('ALTER TABLE {} ADD COLUMN {} {}'.format(quote(table), quote(column), ddl))
+                if backfill is not None:
+                    connection.execute(backfill)
+                added.append((table, column))
+    inspector = inspect(engine)
+    if 'ix_game_gamename' not in {index['name'] for index in inspector.get_indexes('game')}:
+        rename_duplicate_games()
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+    return added
+
+
+def rename_duplicate_games():
+    """Suffixes the id to every game but the first of each name, so gamename can become unique."""
+
+    with db.engine.begin() as connection:
+        connection.execute("UPDATE game SET gamename = gamename || '-' || id "
+                           "WHERE id NOT IN (SELECT MIN(id) FROM game GROUP BY gamename)")
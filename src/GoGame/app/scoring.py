@@ -0,0 +1,119 @@
+import numpy as np
+from app.gameboard import COLOR_DARK, COLOR_LIGHT
+
+AREA = 'area'
+TERRITORY = 'territory'
+
+
+class Score:
+    """Final score of one position under area (Chinese) or territory (Japanese) rules.
+
+    Dead stones are not detected, so positions should be played out until
+    only settled groups remain, as at the end of a game.
+    """
+
+    def __init__(self, rules, komi, dark_stones, light_stones, dark_territory, light_territory,
+                 dark_captures, light_captures):
+        self.rules = rules
+        self.komi = komi
+        self.dark_stones = dark_stones
+        self.light_stones = light_stones
+        self.dark_territory = dark_territory
+        self.light_territory = light_territory
+        self.dark_captures = dark_captures
+        self.light_captures = light_captures
+
+    @property
+    def dark(self):
+        if self.rules == AREA:
+            return self.dark_stones + self.dark_territory
+        return self.dark_territory + self.dark_captures
+
+    @property
+    def light(self):
+        if self.rules == AREA:
+            return self.light_stones + self.light_territory
+        return self.light_territory + self.light_captures
+
+    @property
+    def margin(self):
+        """Dark's lead after komi; negative when light wins."""
+
+        return self.dark - self.light - self.komi
+
+    @property
+    def winner(self):
+        if self.margin > 0:
+            return COLOR_DARK
+        if self.margin < 0:
+            return COLOR_LIGHT
+        return None
+
+
+def stone_arrays(gameboards):
+    """Unpacks the bitboards of same-sized boards into (boards, size, size) bool arrays."""
+
+    size = gameboards[0].size
+    width = (size * size + 7) // 8
+    arrays = []
+    for color in (COLOR_DARK, COLOR_LIGHT):
+        packed = b''.join(gameboard.stones[color].to_bytes(width, 'little') for gameboard in gameboards)
+        bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8).reshape(len(gameboards), width),
+                             axis=1, bitorder='little')
+        arrays.append(bits[:, :size * size].reshape(len(gameboards), size, size).astype(bool))
+    return arrays
+
+
+def dilate(mask):
+    """Grows every region of a (boards, size, size) mask by its orthogonal neighbours."""
+
+    grown = mask.copy()
+    grown[:, 1:, :] |= mask[:, :-1, :]
+    grown[:, :-1, :] |= mask[:, 1:, :]
+    grown[:, :, 1:] |= mask[:, :, :-1]
+    grown[:, :, :-1] |= mask[:, :, 1:]
+    return grown
+
+
+def reachable(stones, empty):
+    """Marks the empty points connected through empty points to any of the stones.
+
+    All boards of the batch are flood-filled together until none changes.
+    """
+
+    region = dilate(stones) & empty
+    while True:
+        grown = dilate(region) & empty
+        if np.array_equal(grown, region):
+            return region
+        region = grown
+
+
+def score_batch(gameboards, komi=6.5, rules=AREA):
+    """Scores many boards at once; boards of different sizes are batched per size."""
+
+    scores = [None] * len(gameboards)
+    by_size = {}
+    for i, gameboard in enumerate(gameboards):
+        by_size.setdefault(gameboard.size, []).append(i)
+
+    for indices in by_size.values():
+        batch = [gameboards[i] for i in indices]
+        dark, light = stone_arrays(batch)
+        empty = ~(dark | light)
+        dark_reach = reachable(dark, empty)
+        light_reach = reachable(light, empty)
+        dark_territory = (dark_reach & ~light_reach).sum(axis=(1, 2))
+        light_territory = (light_reach & ~dark_reach).sum(axis=(1, 2))
+        dark_stones = dark.sum(axis=(1, 2))
+        light_stones = light.sum(axis=(1, 2))
+        for j, i in enumerate(indices):
+            gameboard = gameboards[i]
+            scores[i] = Score(rules, komi, int(dark_stones[j]), int(light_stones[j]),
+                              int(dark_territory[j]), int(light_territory[j]),
+                              gameboard.captures[COLOR_DARK], gameboard.captures[COLOR_LIGHT])
+    return scores
+
+
+def score(gameboard, komi=6.5, rules=AREA):
+    return score_batch([gameboard], komi, rules)[0]
@@ -0,0 +1,59 @@
+import struct
+import zlib
+from app.gameboard import Gameboard, COLOR_DARK, COLOR_LIGHT
+
+SNAPSHOT_VERSION = 1
+LAST_MOVE_CODES = {None: 0, COLOR_DARK: 1, COLOR_LIGHT: 2}
+LAST_MOVES = {code: color for color, code in LAST_MOVE_CODES.items()}
+
+# version, board size, last mover, dark captures, light captures, move count
+HEADER = struct.Struct('<BBBHHI')
+
+
+def dump_packed(gameboard):
+    """Packs a board into a fixed header plus one little-endian bitboard per colour."""
+
+    width = (gameboard.size * gameboard.size + 7) // 8
+    header = HEADER.pack(SNAPSHOT_VERSION, gameboard.size, LAST_MOVE_CODES[gameboard.last_move],
+                         gameboard.captures[COLOR_DARK], gameboard.captures[COLOR_LIGHT],
+                         gameboard.move_count)
+    return (header + gameboard.stones[COLOR_DARK].to_bytes(width, 'little') +
+            gameboard.stones[COLOR_LIGHT].to_bytes(width, 'little'))
+
+
+def load_packed(data, history=None):
+    version, size, last_move, dark_captures, light_captures, move_count = HEADER.unpack_from(data)
+    if version != SNAPSHOT_VERSION:
+        raise ValueError('Unsupported snapshot version {}'.format(version))
+    width = (size * size + 7) // 8
+    offset = HEADER.size
+    stones = {
+        COLOR_DARK: int.from_bytes(data[offset:offset + width], 'little'),
+        COLOR_LIGHT: int.from_bytes(data[offset + width:offset + 2 * width], 'little'),
+    }
+    captures = {COLOR_DARK: dark_captures, COLOR_LIGHT: light_captures}
+    return Gameboard.from_stones(size, stones, LAST_MOVES[last_move], history, captures, move_count)
+
+
+def dump_zlib(gameboard):
+    return zlib.compress(dump_packed(gameboard))
+
+
+def load_zlib(data, history=None):
+    return load_packed(zlib.decompress(data), history)
+
+
+FORMATS = {
+    'packed': (dump_packed, load_packed),
+    'zlib': (dump_zlib, load_zlib),
+}
+
+
+def dump_board(gameboard, fmt='packed'):
+    """Serializes a board with one of the registered snapshot formats."""
+
+    return FORMATS[fmt][0](gameboard)
+
+
+def load_board(data, fmt='packed', history=None):
+    return FORMATS[fmt][1](data, history)
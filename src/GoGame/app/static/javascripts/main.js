@@ -1,111 +1,83 @@
 $(document).ready(bind_events);
 
 function bind_events() {
-  var current_position;
-
-  var $black_squares = $('tr:nth-child(odd) td:nth-child(even), tr:nth-child(even) td:nth-child(odd)');
-  $black_squares.click(function () {
-     if (current_position === undefined) {
-      var pieces = pieces_on_board();
-      $.post('/first_move/' + gamename,
-        {
-          x: $(this).data('x'),
-          y: $(this).data('y'),
-          pieces: pieces,
-          pieces_count: pieces.length,
-          last_move: GameConfig.last_move
-        },
-        function (data, status) {
-          setTimeout(function () {
-            $('body').html(data);
-            bind_events();
-          }, 300);
-        }
-      );
-    } else {
-      destination = {
-        x: $(this).data('x'),
-        y: $(this).data('y'),
-        offset_left: $(this).offset().left,
-        offset_top: $(this).offset().top
-      }
-
-      var translate_x = destination.offset_left - current_position.offset_left;
-      var translate_y = destination.offset_top - current_position.offset_top;
+  $.ajaxSetup({
+              beforeSend: function(xhr) {
+                  xhr.setRequestHeader('X-CSRFToken', csrf_token);
+              }
+  });
 
-      $selected_piece.css({
-        transform: 'translate(' + translate_x + 'px, ' + translate_y + 'px)',
-        transition: 'transform .3s'
-      });
+  $('.board__square').off('click').click(function () {
+    play_move($(this).data('x'), $(this).data('y'));
+  });
+}
 
-      var pieces = pieces_on_board();
-      $.ajaxSetup({
-                  beforeSend: function(xhr) {
-                      xhr.setRequestHeader('X-CSRFToken', csrf_token);
-                  }
-      });
+function game_url(path) {
+  return '/api/v1/games/' + encodeURIComponent(gamename) + path;
+}
 
-      $.post('/move',
-        {
-          cur_x: current_position.x,
-          cur_y: current_position.y,
-          dst_x: destination.x,
-          dst_y: destination.y,
-          pieces: pieces,
-          pieces_count: pieces.length,
-          board_size: $('tr').length,
-          last_move: GameConfig.last_move
-        },
-        function (data, status) {
-          setTimeout(function () {
-            $('body').html(data);
-            bind_events();
-          }, 300);
-        }
-      );
+function play_move(x, y) {
+  $.ajax({
+    url: game_url('/moves'),
+    type: 'POST',
+    contentType: 'application/json',
+    dataType: 'json',
+    data: JSON.stringify({x: x, y: y}),
+    success: apply_delta,
+    error: function (xhr) {
+      var body = xhr.responseJSON || {};
+      alert(body.error || 'This move is not possible!');
+      if (body.seq !== undefined && body.seq !== GameConfig.seq) {
+        refresh_state();
+      }
     }
   });
 }
 
-function pieces_on_board() {
-  var board_state = [];
+function square(x, y) {
+  return $('.board__square[data-x="' + x + '"][data-y="' + y + '"]');
+}
 
-  $('.board__piece').each(function () {
-    var color;
-    if ($(this).hasClass('board__piece--dark')) {
-      color = 'DarkPiece';
-    }
-    if ($(this).hasClass('board__piece--light')) {
-      color = 'LightPiece';
-    }
+function put_piece(x, y, color) {
+  square(x, y).html('<div class="board__piece board__piece--' + color + '" data-color="' + color + '"></div>');
+}
 
-    board_state.push({
-      x: $(this).parent().data('x'),
-      y: $(this).parent().data('y'),
-      color: color
-    });
+function apply_delta(delta) {
+  if (delta.seq <= GameConfig.seq) {
+    return;
+  }
+  if (delta.seq !== GameConfig.seq + 1) {
+    refresh_state();
+    return;
+  }
+  $.each(delta.captured, function (i, point) {
+    square(point.x, point.y).empty();
   });
+  $.each(delta.placed, function (i, stone) {
+    put_piece(stone.x, stone.y, stone.color);
+  });
+  GameConfig.seq = delta.seq;
+  GameConfig.last_move = delta.last_move;
+}
 
-  return board_state;
+function refresh_state() {
+  $.getJSON(game_url('/state'), function (state) {
+    if (state.seq < GameConfig.seq) {
+      return;
+    }
+    $('.board__piece').remove();
+    $.each(state.stones, function (color, stones) {
+      $.each(stones, function (i, point) {
+        put_piece(point.x, point.y, color);
+      });
+    });
+    GameConfig.seq = state.seq;
+    GameConfig.last_move = state.last_move;
+  });
 }
 
 function check_if_someone_won() {
-  var num_of_light_pieces = $('.board__piece--light').length;
-  var num_of_dark_pieces = $('.board__piece--dark').length;
-  var pieces = pieces_on_board();
-
-  if (num_of_light_pieces > num_of_dark_pieces) {
-    alert('Light pieces won!')
-  }
-
-  if (num_of_dark_pieces === 0) {
-    alert('Dark pieces won!')
-  }
   $.post('/stop_game/' + gamename,
-    {
-      light_pieces: num_of_light_pieces,
-      dark_pieces: num_of_dark_pieces
-    },
     function (data, status) {
       setTimeout(function () {
         $('body').html(data);
@@ -116,13 +88,5 @@ function check_if_someone_won() {
 }
 
 function show_other_player_move() {
-  var pieces = pieces_on_board();
-  $.post('/update_board/' + gamename,
-    function (data, status) {
-      setTimeout(function () {
-        $('body').html(data);
-        bind_events();
-      }, 300);
-    }
-  );
+  refresh_state();
 }
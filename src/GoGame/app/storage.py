@@ -0,0 +1,98 @@
+import itertools
+import sqlite3
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+class Storage:
+    """Tunes the database engine for the configured backend and adds read replicas.
+
+    SQLite connections get WAL journaling, synchronous=NORMAL and a busy
+    timeout, so readers never wait on the writer and concurrent commits
+    queue instead of failing. Server databases get a sized pool with
+    pre-ping and recycling. DATABASE_REPLICA_URLS lists read-only copies
+    that listing and history pages read from; any SQLite file, including
+    game.db itself, works as a local stand-in.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = db
+        self.app = None
+        self.sessions = []
+        self.engines = []
+        self.cycle = None
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db=None):
+        self.app = app
+        self.db = db or self.db
+        self.sessions = []
+        self.engines = []
+        self.cycle = None
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.update(self.engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+        if not event.contains(Engine, 'connect', self.on_connect):
+            event.listen(Engine, 'connect', self.on_connect)
+        app.teardown_appcontext(self.remove_sessions)
+        app.extensions['storage'] = self
+
+    def engine_options(self, url):
+        config = self.app.config
+        if is_sqlite(url):
+            return {'connect_args': {'timeout': config['SQLITE_BUSY_TIMEOUT'] / 1000.0}}
+        return {'pool_size': config['DATABASE_POOL_SIZE'],
+                'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+                'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+                'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+                'pool_pre_ping': True}
+
+    def on_connect(self, dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        config = self.app.config
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode={}'.format(config['SQLITE_JOURNAL_MODE']))
+        cursor.execute('PRAGMA synchronous={}'.format(config['SQLITE_SYNCHRONOUS']))
+        cursor.execute('PRAGMA busy_timeout={:d}'.format(config['SQLITE_BUSY_TIMEOUT']))
+        cursor.close()
+
+    def replica_sessions(self):
+        with self.lock:
+            if self.cycle is None:
+                for url in self.app.config['DATABASE_REPLICA_URLS']:
+                    engine = create_engine(url, **self.engine_options(url))
+                    self.engines.append(engine)
+                    # Empty binds, or Flask-SQLAlchemy maps every model table back to the primary.
+                    self.sessions.append(self.db.create_scoped_session({'bind': engine, 'binds': {}}))
+                self.cycle = itertools.cycle(self.sessions)
+        return self.sessions
+
+    def reader(self):
+        """Session for queries that may read slightly stale data; the primary when there are no replicas."""
+
+        if not self.replica_sessions():
+            return self.db.session
+        return next(self.cycle)
+
+    def query(self, *entities):
+        return self.reader().query(*entities)
+
+    def reset(self):
+        """Drops connections inherited from a parent process so each worker opens its own."""
+
+        self.db.get_engine(self.app).dispose()
+        for engine in self.engines:
+            engine.dispose()
+        self.lock = threading.Lock()
+
+    def remove_sessions(self, exc=None):
+        for session in self.sessions:
+            session.remove()
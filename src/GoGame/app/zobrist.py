@@ -0,0 +1,49 @@
+import random
+from app.bitboard import iter_bits
+from app.piece import COLOR_LIGHT, COLOR_DARK
+
+ZOBRIST_SEED = 681
+
+
+class ZobristTable:
+    """Random keys per colour and point, fixed by seed so hashes agree across processes.
+
+    Keys are 63 bits wide so that a position hash fits a signed 64-bit
+    database column.
+    """
+
+    _cache = {}
+
+    @classmethod
+    def for_size(cls, size):
+        table = cls._cache.get(size)
+        if table is None:
+            table = cls._cache[size] = ZobristTable(size)
+        return table
+
+    def __init__(self, size, seed=ZOBRIST_SEED):
+        rng = random.Random('{}:{}'.format(seed, size))
+        self.size = size
+        self.keys = {}
+        for color in (COLOR_DARK, COLOR_LIGHT):
+            self.keys[color] = [rng.getrandbits(63) for _ in range(size * size)]
+
+    def key(self, color, index):
+        return self.keys[color][index]
+
+    def hash_of(self, mask, color):
+        """XORs together the keys of every stone of color in the mask."""
+
+        keys = self.keys[color]
+        value = 0
+        for bit in iter_bits(mask):
+            value ^= keys[bit.bit_length() - 1]
+        return value
+
+    def position_hash(self, stones):
+        """Hashes a whole position given as a colour to bitboard mapping."""
+
+        value = 0
+        for color, mask in stones.items():
+            value ^= self.hash_of(mask, color)
+        return value
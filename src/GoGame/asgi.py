@@ -0,0 +1,5 @@
+from app import create_app, notifier
+from app.asgi import AsyncGameServer
+
+app = create_app()
+application = AsyncGameServer(app, notifier)
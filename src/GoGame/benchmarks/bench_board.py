@@ -0,0 +1,62 @@
+"""Gameboard micro-benchmarks: single placements, captures and whole-game replays.
+
+place times every move of a long random game, capture only the moves that
+took stones, and replay rebuilds the whole game from an empty board.
+
+Usage: python benchmarks/bench_board.py [--moves 300] [--repeat 20] [--save-baseline | --compare]
+"""
+import argparse
+import sys
+import time
+
+from common import SIZES, random_game, replay, summarize, add_baseline_arguments, print_results, check_baseline
+from app.gameboard import Gameboard
+
+
+def time_moves(moves, size):
+    """Replays moves timing each placement; returns (all latencies, capture latencies)."""
+
+    gameboard = Gameboard.build(size)
+    timings = []
+    captures = []
+    for x, y, color in moves:
+        start = time.perf_counter()
+        gameboard.place(x, y, color)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        if gameboard.last_captured:
+            captures.append(elapsed)
+    return timings, captures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--moves', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=20)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for size in SIZES:
+        moves = random_game(size, args.moves, seed=size)
+        place, capture, replays = [], [], []
+        for _ in range(args.repeat):
+            timings, captured = time_moves(moves, size)
+            place += timings
+            capture += captured
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            replay_start = time.perf_counter()
+            replay(moves, size)
+            replays.append(time.perf_counter() - replay_start)
+        replay_elapsed = time.perf_counter() - start
+
+        results['{0}x{0} place'.format(size)] = summarize(place, sum(place))
+        results['{0}x{0} capture'.format(size)] = summarize(capture, sum(capture))
+        results['{0}x{0} replay {1}'.format(size, len(moves))] = summarize(replays, replay_elapsed)
+    print_results(results)
+    return check_baseline(args, 'board', results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""Compares the union-find group tracker with a from-scratch flood-fill engine.
+
+replay times whole random games; empty/random/chain time legality checks of
+every empty point on an empty board, a crowded random board and a board
+holding one long serpentine chain, where flood-fills are at their worst.
+
+Usage: python benchmarks/bench_groups.py [--repeat N]
+"""
+import argparse
+
+from common import SIZES, random_game, replay, best_of
+from app.bitboard import BoardMasks, popcount
+from app.gameboard import Gameboard, OPPONENT, COLOR_DARK, COLOR_LIGHT
+
+
+class FloodFillBoard:
+    """Baseline that recomputes groups and liberties with flood-fills on every move."""
+
+    @classmethod
+    def build(cls, size):
+        return FloodFillBoard(size)
+
+    def __init__(self, size):
+        self.size = size
+        self.masks = BoardMasks.for_size(size)
+        self.stones = {COLOR_DARK: 0, COLOR_LIGHT: 0}
+
+    def is_legal(self, x, y, color):
+        return self.__resolve(x, y, color) is not None
+
+    def place(self, x, y, color):
+        captured = self.__resolve(x, y, color)
+        if captured is None:
+            return False
+        self.stones[color] |= 1 << (y * self.size + x)
+        self.stones[OPPONENT[color]] &= ~captured
+        return True
+
+    def __resolve(self, x, y, color):
+        masks = self.masks
+        point = 1 << (y * self.size + x)
+        if (self.stones[COLOR_DARK] | self.stones[COLOR_LIGHT]) & point:
+            return None
+        own = self.stones[color] | point
+        opponent = self.stones[OPPONENT[color]]
+        empty = masks.full & ~(own | opponent)
+        captured = 0
+        adjacent = masks.neighbours(point) & opponent
+        while adjacent:
+            group = masks.flood_fill(adjacent & -adjacent, opponent)
+            if not masks.neighbours(group) & empty:
+                captured |= group
+            adjacent &= ~group
+        if not captured and not masks.neighbours(masks.flood_fill(point, own)) & empty:
+            return None
+        return captured
+
+
+def serpentine(size):
+    """Returns moves building one dark chain that snakes across the whole board."""
+
+    moves = []
+    for y in range(0, size, 2):
+        moves.extend((x, y, COLOR_DARK) for x in range(size))
+        if y + 1 < size:
+            moves.append(((size - 1) if y % 4 == 0 else 0, y + 1, COLOR_DARK))
+    return moves
+
+
+def empty_points(gameboard, size):
+    return [(x, y) for y in range(size) for x in range(size) if gameboard.color_at(x, y) is None]
+
+
+def check_all(gameboard, points):
+    for color in (COLOR_DARK, COLOR_LIGHT):
+        for x, y in points:
+            gameboard.is_legal(x, y, color)
+
+
+def build(moves, size, board_class):
+    gameboard = board_class.build(size)
+    for x, y, color in moves:
+        gameboard.last_move = None
+        gameboard.place(x, y, color)
+    return gameboard
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>5} {:>9} {:>7} {:>14} {:>14} {:>8}'.format(
+        'size', 'scenario', 'stones', 'flood us/op', 'tracker us/op', 'speedup'))
+    for size in SIZES:
+        moves = random_game(size, size * size * 2, seed=size)
+        flood_time = best_of(args.repeat, replay, moves, size, FloodFillBoard)
+        tracker_time = best_of(args.repeat, replay, moves, size)
+        report(size, 'replay', replay(moves, size), len(moves), flood_time, tracker_time)
+
+        for scenario, position in (('empty', []), ('random', moves), ('chain', serpentine(size))):
+            flood = build(position, size, FloodFillBoard)
+            tracked = build(position, size, Gameboard)
+            assert flood.stones == tracked.stones
+            tracked.last_move = None
+            points = empty_points(tracked, size)
+            flood_time = best_of(args.repeat, check_all, flood, points)
+            tracker_time = best_of(args.repeat, check_all, tracked, points)
+            report(size, scenario, tracked, 2 * len(points), flood_time, tracker_time)
+
+
+def report(size, scenario, gameboard, ops, flood_time, tracker_time):
+    print('{:>5} {:>9} {:>7} {:>14.2f} {:>14.2f} {:>7.1f}x'.format(
+        size, scenario, popcount(gameboard.occupied), flood_time / ops * 1e6,
+        tracker_time / ops * 1e6, flood_time / tracker_time))
+
+
+if __name__ == '__main__':
+    main()
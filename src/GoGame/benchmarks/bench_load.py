@@ -0,0 +1,145 @@
+"""End-to-end load test: simulated players create, join, play and stream games.
+
+Every game runs in its own thread with two players driving the Flask app
+through its test client against a fresh SQLite database in a temporary
+directory. The second player keeps /stream open, so the stream row is the
+delay between a move being sent and the opponent seeing it.
+
+Usage: python benchmarks/bench_load.py [--games 8] [--moves 40] [--save-baseline | --compare]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# The app reads its settings on import, which importing common triggers.
+DIRECTORY = tempfile.mkdtemp(prefix='gogame-bench-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DIRECTORY, 'game.db')
+os.environ.setdefault('BCRYPT_LOG_ROUNDS', '4')
+
+from common import summarize, add_baseline_arguments, print_results, check_baseline
+
+PASSWORD = 'Passw0rd!'
+BASE_URL = 'https://localhost'
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+
+    def timed(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        response = func(*args, base_url=BASE_URL, **kwargs)
+        self.add(name, time.perf_counter() - start)
+        if response.status_code >= 400:
+            with self.lock:
+                self.errors += 1
+        return response
+
+
+def player(app, name):
+    client = app.test_client()
+    client.post('/signup', base_url=BASE_URL,
+                data=dict(username=name, email=name + '@bench.invalid', password=PASSWORD, password2=PASSWORD))
+    response = client.post('/login', base_url=BASE_URL, data=dict(username=name, password=PASSWORD))
+    if response.status_code != 302:
+        raise RuntimeError('Could not log in {}: {}'.format(name, response.status_code))
+    return client
+
+
+def watch(response, sent, recorder, done):
+    """Reads a game's event stream and times each move from sending to delivery."""
+
+    for chunk in response.response:
+        if done.is_set():
+            break
+        for line in chunk.decode().splitlines():
+            if line.startswith('data: {'):
+                seq = str(json.loads(line[6:])['seq'])
+                if seq in sent:
+                    recorder.add('stream', time.perf_counter() - sent[seq])
+    response.close()
+
+
+def play_game(app, index, dark, light, moves, recorder, seed):
+    from app.gameboard import Gameboard, COLOR_DARK, OPPONENT
+    from app.mcts import random_move, PASS
+
+    name = 'bench{:03d}'.format(index)
+    recorder.timed('create', dark.post, '/create_game', data={'gamename': name})
+    recorder.timed('join', light.get, '/join_game/' + name)
+
+    sent = {}
+    done = threading.Event()
+    stream = light.get('/stream/{}&pl{:04d}'.format(name, index), base_url=BASE_URL, buffered=False)
+    watcher = threading.Thread(target=watch, args=(stream, sent, recorder, done), daemon=True)
+    watcher.start()
+
+    rng = random.Random(seed)
+    mirror = Gameboard.build(9)
+    clients = {COLOR_DARK: dark, OPPONENT[COLOR_DARK]: light}
+    color = COLOR_DARK
+    for number in range(1, moves + 1):
+        move = random_move(mirror, color, rng)
+        if move is PASS:
+            break
+        mirror.place(move[0], move[1], color, check_turn=False)
+        sent[str(number)] = time.perf_counter()
+        recorder.timed('move', clients[color].post, '/api/v1/games/{}/moves'.format(name),
+                       json={'x': move[0], 'y': move[1]})
+        if number % 10 == 0:
+            recorder.timed('state', clients[color].get, '/api/v1/games/{}/state'.format(name))
+        color = OPPONENT[color]
+    recorder.timed('stop', dark.post, '/stop_game/' + name)
+    done.set()
+    watcher.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=8, help='Games played concurrently.')
+    parser.add_argument('--moves', type=int, default=40, help='Moves per game.')
+    parser.add_argument('--seed', type=int, default=0)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['STREAM_KEEPALIVE_SECONDS'] = 1
+
+    recorder = Recorder()
+    players = [(player(app, 'pd{:04d}'.format(i)), player(app, 'pl{:04d}'.format(i))) for i in range(args.games)]
+    threads = [threading.Thread(target=play_game, args=(app, i, dark, light, args.moves, recorder, args.seed + i))
+               for i, (dark, light) in enumerate(players)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(DIRECTORY, ignore_errors=True)
+
+    results = {'load ' + name: summarize(samples, elapsed) for name, samples in recorder.samples.items()}
+    print_results(results)
+    requests = sum(len(samples) for name, samples in recorder.samples.items() if name != 'stream')
+    print('{} requests in {:.2f}s: {:.1f} requests/s, {} errors'.format(
+        requests, elapsed, requests / elapsed, recorder.errors))
+    return check_baseline(args, 'load', results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Measures MCTS playout throughput per core, for sizing bot hardware.
+
+Usage: python benchmarks/bench_mcts.py [--seconds 3] [--workers N]
+"""
+import argparse
+
+from common import SIZES, random_game, replay
+from app.gameboard import OPPONENT, COLOR_DARK
+from app.mcts import MCTSEngine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    engine = MCTSEngine(playouts=None, time_limit=args.seconds, workers=args.workers, seed=0)
+    print('{:>5} {:>7} {:>8} {:>9} {:>12} {:>16}'.format(
+        'size', 'stage', 'workers', 'playouts', 'playouts/s', 'playouts/s/core'))
+    try:
+        for size in SIZES:
+            for stage, moves in (('opening', 0), ('middle', size * size // 3)):
+                played = random_game(size, moves, seed=size)
+                gameboard = replay(played, size)
+                color = OPPONENT[played[-1][2]] if played else COLOR_DARK
+                result = engine.best_move(gameboard, color)
+                print('{:>5} {:>7} {:>8} {:>9} {:>12.1f} {:>16.1f}'.format(
+                    size, stage, result.workers, result.playouts, result.playouts_per_second,
+                    result.playouts_per_second_per_core))
+    finally:
+        engine.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Compares rebuilding a board by full replay with restoring a snapshot and replaying the tail.
+
+Snapshots are taken every --interval moves; the restore replays whatever
+was played after the latest one, which is what load_gameboard does. The
+tail column is also the number of GameMove rows the restore has to fetch.
+
+Usage: python benchmarks/bench_snapshot.py [--moves 300] [--interval 50] [--repeat N]
+"""
+import argparse
+
+from common import SIZES, random_game, replay, best_of
+from app.snapshot import FORMATS, dump_board, load_board
+
+
+def restore(data, fmt, tail):
+    gameboard = load_board(data, fmt)
+    for x, y, color in tail:
+        gameboard.place(x, y, color, check_turn=False)
+    return gameboard
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--moves', type=int, default=300)
+    parser.add_argument('--interval', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print('{:>5} {:>6} {:>5} {:>7} {:>6} {:>14} {:>14} {:>8}'.format(
+        'size', 'moves', 'tail', 'format', 'bytes', 'replay ms', 'snapshot ms', 'speedup'))
+    for size in SIZES:
+        moves = random_game(size, args.moves, seed=size)
+        checkpoint = len(moves) - len(moves) % args.interval
+        if checkpoint == len(moves):
+            checkpoint -= args.interval
+        snapshot_board = replay(moves[:checkpoint], size)
+        tail = moves[checkpoint:]
+        full_time = best_of(args.repeat, replay, moves, size)
+        for fmt in sorted(FORMATS):
+            data = dump_board(snapshot_board, fmt)
+            assert restore(data, fmt, tail).stones == replay(moves, size).stones
+            snapshot_time = best_of(args.repeat, restore, data, fmt, tail)
+            print('{:>5} {:>6} {:>5} {:>7} {:>6} {:>14.3f} {:>14.3f} {:>7.1f}x'.format(
+                size, len(moves), len(tail), fmt, len(data), full_time * 1e3, snapshot_time * 1e3,
+                full_time / snapshot_time))
+
+
+if __name__ == '__main__':
+    main()
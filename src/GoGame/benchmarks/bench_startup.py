@@ -0,0 +1,113 @@
+"""Measures worker cold start: time to a ready app and memory per worker.
+
+cold starts fresh interpreters that import game.py, as a non-preloading
+server does for every worker. fork builds and preloads the app once, then
+forks workers that only run after_fork, as gunicorn does with
+preload_app. Each worker reports its startup time, RSS and the part of it
+that is private to the worker rather than shared with the parent.
+
+The database URL points at a file that does not exist; startup must not
+create it.
+
+Usage: python benchmarks/bench_startup.py [--workers 4] [--save-baseline | --compare]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Config reads the database URL on import, which importing common triggers.
+DIRECTORY = tempfile.mkdtemp(prefix='gogame-startup-')
+DATABASE = os.path.join(DIRECTORY, 'game.db')
+os.environ['DATABASE_URL'] = 'sqlite:///' + DATABASE
+
+from common import summarize, add_baseline_arguments, print_results, check_baseline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLD = '''
+import json, time
+start = time.perf_counter()
+import game
+elapsed = time.perf_counter() - start
+from bench_startup import memory_usage
+print(json.dumps(dict(memory_usage(), seconds=elapsed)))
+'''
+
+
+def memory_usage():
+    """Resident and private (not shared with other processes) memory in bytes, from /proc."""
+
+    usage = {'rss': 0, 'private': 0}
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            for line in smaps:
+                name, value = line.split(':', 1)
+                if name == 'Rss':
+                    usage['rss'] = int(value.split()[0]) * 1024
+                elif name in ('Private_Clean', 'Private_Dirty'):
+                    usage['private'] += int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+        usage['rss'] = usage['private'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
+
+
+def cold_start(workers, env):
+    reports = []
+    for _ in range(workers):
+        output = subprocess.check_output([sys.executable, '-c', COLD], cwd=ROOT, env=env)
+        reports.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return reports
+
+
+def fork_start(workers):
+    from app.lifecycle import preload, after_fork
+    import game
+    preload(game.app)
+
+    reports = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            after_fork(game.app)
+            report = dict(memory_usage(), seconds=time.perf_counter() - start)
+            os.write(write, json.dumps(report).encode())
+            os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as pipe:
+            reports.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, 'benchmarks')]))
+
+    results = {}
+    print('{:<6} {:>10} {:>10} {:>12}'.format('mode', 'ms', 'RSS MB', 'private MB'))
+    for mode, reports in (('cold', cold_start(args.workers, env)), ('fork', fork_start(args.workers))):
+        for report in reports:
+            print('{:<6} {:>10.1f} {:>10.1f} {:>12.1f}'.format(
+                mode, report['seconds'] * 1e3, report['rss'] / 2 ** 20, report['private'] / 2 ** 20))
+        seconds = [report['seconds'] for report in reports]
+        results['startup ' + mode] = summarize(seconds, sum(seconds))
+    print_results(results)
+    if os.path.exists(DATABASE):
+        print('Startup created {}'.format(DATABASE))
+        return 1
+    return check_baseline(args, 'startup', results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
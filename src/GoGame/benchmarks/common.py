@@ -0,0 +1,127 @@
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.gameboard import Gameboard, OPPONENT, COLOR_DARK
+
+SIZES = (9, 13, 19)
+
+
+def random_game(size, moves, seed=0):
+    """Plays random legal moves and returns them as (x, y, color) tuples."""
+
+    rng = random.Random(seed)
+    gameboard = Gameboard.build(size)
+    color = COLOR_DARK
+    played = []
+    while len(played) < moves:
+        candidates = [(x, y) for x in range(size) for y in range(size) if gameboard.is_legal(x, y, color)]
+        if not candidates:
+            break
+        x, y = rng.choice(candidates)
+        gameboard.place(x, y, color)
+        played.append((x, y, color))
+        color = OPPONENT[color]
+    return played
+
+
+def replay(moves, size, board_class=Gameboard):
+    gameboard = board_class.build(size)
+    for x, y, color in moves:
+        gameboard.place(x, y, color)
+    return gameboard
+
+
+def best_of(repeat, func, *args):
+    """Returns the fastest wall time of func over repeat runs, in seconds."""
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of a list of samples, q in 0..100."""
+
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples, elapsed):
+    """Latency samples in seconds and the wall time they took -> p50/p99 in ms and ops/s."""
+
+    return {'count': len(samples),
+            'p50_ms': percentile(samples, 50) * 1e3,
+            'p99_ms': percentile(samples, 99) * 1e3,
+            'ops_per_s': len(samples) / elapsed if elapsed else 0.0}
+
+
+def add_baseline_arguments(parser):
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store these results as the baseline for later runs.')
+    parser.add_argument('--compare', action='store_true',
+                        help='Fail when p50 or p99 is worse than the baseline by more than --tolerance.')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed slowdown as a fraction of the baseline (default 0.5).')
+
+
+def print_results(results):
+    print('{:<32} {:>7} {:>10} {:>10} {:>12}'.format('benchmark', 'count', 'p50 ms', 'p99 ms', 'ops/s'))
+    for key in sorted(results):
+        row = results[key]
+        print('{:<32} {:>7} {:>10.3f} {:>10.3f} {:>12.1f}'.format(
+            key, row['count'], row['p50_ms'], row['p99_ms'], row['ops_per_s']))
+
+
+def check_baseline(args, suite, results):
+    """Saves or compares results against the suite's entry in baseline.json; returns the exit status."""
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline[suite] = {key: {metric: round(value, 4) for metric, value in row.items()}
+                           for key, row in results.items()}
+        with open(BASELINE, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print('Saved baseline for {}'.format(suite))
+        return 0
+    if not args.compare:
+        return 0
+
+    stored = baseline.get(suite)
+    if stored is None:
+        print('No baseline stored for {}'.format(suite))
+        return 1
+    regressions = []
+    for key in sorted(results):
+        if key not in stored:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            before, after = stored[key][metric], results[key][metric]
+            if before and after > before * (1 + args.tolerance):
+                regressions.append('{} {}: {:.3f} -> {:.3f} ({:+.0%})'.format(
+                    key, metric, before, after, after / before - 1))
+    for line in regressions:
+        print('REGRESSION ' + line)
+    if not regressions:
+        print('No regressions against the {} baseline'.format(suite))
+    return 1 if regressions else 0
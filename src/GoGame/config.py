@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config(object):
@@ -7,6 +8,61 @@ class Config(object):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'game.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SESSION_COOKIE_SECURE=True,
-    SESSION_COOKIE_HTTPONLY=True,
-    SESSION_COOKIE_SAMESITE='Strict'
+    DATABASE_REPLICA_URLS = [url for url in (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url]
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_SYNCHRONOUS = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT = 5000
+    DATABASE_POOL_SIZE = 10
+    DATABASE_MAX_OVERFLOW = 20
+    DATABASE_POOL_TIMEOUT = 30
+    DATABASE_POOL_RECYCLE = 1800
+    GAME_REGISTRY_MAX_GAMES = 1000
+    GAME_REGISTRY_MAX_BYTES = 64 * 1024 * 1024
+    SNAPSHOT_INTERVAL = 50
+    SNAPSHOT_FORMAT = 'packed'
+    NOTIFY_BACKEND = os.environ.get('NOTIFY_BACKEND') or 'local'
+    NOTIFY_REDIS_URL = os.environ.get('NOTIFY_REDIS_URL')
+    STREAM_QUEUE_SIZE = 32
+    STREAM_KEEPALIVE_SECONDS = 15
+    STREAM_REPLAY_SIZE = 64
+    STREAM_REPLAY_GAMES = 1000
+    STREAM_MAX_SUBSCRIBERS = 1000
+    ASYNC_DB_WORKERS = 16
+    ASYNC_MAX_PENDING = 256
+    GAMES_PAGE_SIZE = 50
+    MOVES_PAGE_SIZE = 200
+    KOMI = 6.5
+    SCORING_RULES = 'area'
+    BOT_USERNAME = 'gobot'
+    BOT_PLAYOUTS = 2000
+    BOT_TIME_LIMIT = 5.0
+    BOT_WORKERS = None
+    BOT_MAX_GAMES = 4
+    ANALYSIS_PLAYOUTS = 200
+    ANALYSIS_WORKERS = 2
+    ANALYSIS_PROCESSES = None
+    ANALYSIS_MAX_PENDING = 16
+    ANALYSIS_MAX_GAMES = 100
+    ANALYSIS_CACHE_SIZE = 100000
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS') or 10)
+    PASSWORD_HASH_WORKERS = 2
+    PASSWORD_HASH_MAX_PENDING = 16
+    PASSWORD_HASH_TIMEOUT = 30
+    METRICS_PATH = '/metrics'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_IPS = [ip for ip in (os.environ.get('METRICS_ALLOWED_IPS') or '127.0.0.1,::1').split(',') if ip]
+    RATING_K = 32
+    LEADERBOARD_SIZE = 20
+    LEADERBOARD_SPAN = 5
+    PROFILE_SLOW_REQUESTS = float(os.environ.get('PROFILE_SLOW_REQUESTS') or 0) or None
+    PROFILE_INTERVAL = 0.005
+    PROFILE_DIR = os.path.join(basedir, 'profiles')
+    SESSION_COOKIE_SECURE = True
+    SESSION_COOKIE_HTTPONLY = True
+    SESSION_COOKIE_SAMESITE = 'Strict'
+    PERMANENT_SESSION_LIFETIME = timedelta(minutes=2)
+    SESSION_REFRESH_EACH_REQUEST = False
+    SESSION_REFRESH_AFTER = timedelta(seconds=30)
+    SESSION_SKIP_ENDPOINTS = ('static', 'main.stream', 'metrics')
+    USER_CACHE_TTL = 0
+    USER_CACHE_SIZE = 10000
@@ -0,0 +1,75 @@
+import pytest
+from app.gameboard import Gameboard
+
+
+@pytest.fixture
+def gameboard():
+    return Gameboard.build(9)
+
+
+def play(gameboard, *moves):
+    """Places (x, y, color) stones without enforcing turns and fails on the first rejected one."""
+
+    for x, y, color in moves:
+        move = gameboard.place(x, y, color, check_turn=False)
+        assert move.result, move.error
+    return gameboard
+
+
+@pytest.fixture
+def app(tmp_path):
+    from config import Config
+    from app import create_app, db, registry
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'game.db')
+        DATABASE_REPLICA_URLS = []
+        BCRYPT_LOG_ROUNDS = 4
+        WTF_CSRF_ENABLED = False
+        ANALYSIS_PROCESSES = 1
+
+    app = create_app(TestConfig)
+    for extension in app.extensions.values():
+        if callable(getattr(extension, 'reset', None)):
+            extension.reset()
+    registry.clear()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.get_engine(app).dispose()
+
+
+def make_user(name):
+    from app import db
+    from app.models import User
+    user = User(username=name, email=name + '@test.invalid')
+    user.set_password('Passw0rd!')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def make_game(name, dark, light=None):
+    from app import db
+    from app.models import Game
+    game = Game(gamename=name, player1_id=dark.id, player1_name=dark.username)
+    if light is not None:
+        game.player2_id = light.id
+        game.player2_name = light.username
+    db.session.add(game)
+    db.session.commit()
+    return game
+
+
+@pytest.fixture
+def login(app):
+    """Returns a test client logged in as the given user."""
+
+    def login(user):
+        client = app.test_client()
+        response = client.post('/login', base_url='https://localhost',
+                               data=dict(username=user.username, password='Passw0rd!'))
+        assert response.status_code == 302
+        return client
+    return login
@@ -0,0 +1,14 @@
+from app.lifecycle import preload, after_fork
+
+wsgi_app = 'game:app'
+preload_app = True
+
+
+def when_ready(server):
+    from game import app
+    preload(app)
+
+
+def post_fork(server, worker):
+    from game import app
+    after_fork(app)
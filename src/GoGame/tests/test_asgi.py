@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from conftest import make_user, make_game
+from app import notifier
+from app.asgi import AsyncGameServer, BoundedExecutor
+
+
+def http_scope(path, method='GET', query_string=b'', headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+            'headers': list(headers), 'scheme': 'https', 'server': ('localhost', 443)}
+
+
+def recorder(sent):
+    async def send(message):
+        sent.append(message)
+    return send
+
+
+async def wait_for(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+def test_stream_is_served_natively(app):
+    user = make_user('player')
+    game = make_game('a%26b', user)
+    server = AsyncGameServer(app, notifier)
+    sent = []
+
+    async def scenario():
+        inbox = asyncio.Queue()
+        task = asyncio.ensure_future(server.stream(http_scope('/stream/a%26b&player'), inbox.get, recorder(sent)))
+        await asyncio.wait_for(wait_for(lambda: sent), 5)
+        notifier.publish(game.id, '{"seq": 1}')
+        await asyncio.wait_for(wait_for(lambda: len(sent) > 1), 5)
+        await inbox.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    server.executor.shutdown()
+    assert sent[0]['status'] == 200
+    assert sent[1]['body'] == b'id: 1\ndata: {"seq": 1}\n\n'
+    assert not notifier.broadcast(game.id).subscribers
+
+
+def test_stream_of_an_unknown_game(app):
+    server = AsyncGameServer(app, notifier)
+    sent = []
+
+    async def receive():
+        return {'type': 'http.disconnect'}
+
+    asyncio.run(server(http_scope('/stream/nope&player'), receive, recorder(sent)))
+    server.executor.shutdown()
+    assert sent[0]['status'] == 404
+
+
+def test_other_routes_run_the_flask_app(app):
+    server = AsyncGameServer(app, notifier)
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    asyncio.run(server(http_scope('/login'), receive, recorder(sent)))
+    server.executor.shutdown()
+    assert sent[0]['status'] == 200
+    assert (b'content-type', b'text/html; charset=utf-8') in sent[0]['headers']
+    assert b'<form' in sent[1]['body']
+
+
+def test_bounded_executor_caps_calls_in_flight():
+    executor = BoundedExecutor(max_workers=4, max_pending=2)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+        return True
+
+    async def scenario():
+        return await asyncio.gather(*(executor.run(work) for _ in range(8)))
+
+    assert asyncio.run(scenario()) == [True] * 8
+    executor.shutdown()
+    assert max(peak) == 2
@@ -0,0 +1,21 @@
+import logging
+import pytest
+from conftest import make_user, make_game
+from app import bot
+
+
+class BrokenEngine:
+    def best_move(self, position, color):
+        raise RuntimeError('search pool is gone')
+
+
+def test_failed_replies_are_logged(app, caplog, monkeypatch):
+    game = make_game('g', make_user('player'))
+    bot.join(game)
+    bot.start()
+    monkeypatch.setattr(bot, 'engine', BrokenEngine())
+    with caplog.at_level(logging.ERROR):
+        with pytest.raises(RuntimeError):
+            bot.respond(game.id).result(5)
+    record, = [r for r in caplog.records if r.getMessage() == 'gobot: no reply in game {}'.format(game.id)]
+    assert 'search pool is gone' in record.exc_text
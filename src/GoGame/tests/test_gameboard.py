@@ -0,0 +1,89 @@
+from conftest import play
+from app.gameboard import COLOR_DARK, COLOR_LIGHT
+
+
+def test_alternation(gameboard):
+    assert gameboard.place(2, 2, COLOR_DARK).result
+    move = gameboard.place(3, 3, COLOR_DARK)
+    assert not move.result
+    assert move.error == 'It is not your turn!'
+    assert gameboard.place(3, 3, COLOR_LIGHT).result
+
+
+def test_out_of_bounds_and_occupied(gameboard):
+    assert not gameboard.place(9, 0, COLOR_DARK).result
+    assert not gameboard.place(-1, 0, COLOR_DARK).result
+    play(gameboard, (4, 4, COLOR_DARK))
+    assert gameboard.place(4, 4, COLOR_LIGHT).error == 'This point is already taken!'
+
+
+def test_capture_in_corner(gameboard):
+    play(gameboard, (0, 0, COLOR_LIGHT), (1, 0, COLOR_DARK), (0, 1, COLOR_DARK))
+    assert gameboard.color_at(0, 0) is None
+    assert gameboard.captures[COLOR_DARK] == 1
+    assert gameboard.coordinates(gameboard.last_captured) == [(0, 0)]
+
+
+def test_capture_of_a_group(gameboard):
+    play(gameboard, (0, 0, COLOR_LIGHT), (1, 0, COLOR_LIGHT),
+         (0, 1, COLOR_DARK), (1, 1, COLOR_DARK), (2, 0, COLOR_DARK))
+    assert gameboard.stones[COLOR_LIGHT] == 0
+    assert gameboard.captures[COLOR_DARK] == 2
+    assert gameboard.liberties(1, 1) == 5
+
+
+def test_suicide_is_rejected(gameboard):
+    play(gameboard, (1, 0, COLOR_DARK), (0, 1, COLOR_DARK))
+    move = gameboard.place(0, 0, COLOR_LIGHT, check_turn=False)
+    assert move.error == 'Suicide is not allowed!'
+    assert not gameboard.is_legal(0, 0, COLOR_LIGHT)
+    assert gameboard.color_at(0, 0) is None
+
+
+def test_filling_own_last_liberty_with_a_capture_is_allowed(gameboard):
+    play(gameboard, (1, 0, COLOR_DARK), (0, 1, COLOR_DARK), (1, 1, COLOR_LIGHT), (2, 0, COLOR_LIGHT),
+         (0, 2, COLOR_LIGHT))
+    assert gameboard.place(0, 0, COLOR_LIGHT, check_turn=False).result
+    assert gameboard.color_at(1, 0) is None
+    assert gameboard.color_at(0, 1) is None
+
+
+def ko(gameboard):
+    play(gameboard, (1, 0, COLOR_DARK), (0, 1, COLOR_DARK), (1, 2, COLOR_DARK),
+         (2, 0, COLOR_LIGHT), (3, 1, COLOR_LIGHT), (2, 2, COLOR_LIGHT), (1, 1, COLOR_LIGHT))
+    play(gameboard, (2, 1, COLOR_DARK))
+    return gameboard
+
+
+def test_ko_cannot_be_retaken_at_once(gameboard):
+    ko(gameboard)
+    assert gameboard.color_at(1, 1) is None
+    move = gameboard.place(1, 1, COLOR_LIGHT)
+    assert move.error == 'This move repeats an earlier position!'
+    assert gameboard.color_at(2, 1) == COLOR_DARK
+
+
+def test_ko_can_be_retaken_after_a_threat(gameboard):
+    ko(gameboard)
+    play(gameboard, (7, 7, COLOR_LIGHT), (7, 6, COLOR_DARK))
+    assert gameboard.place(1, 1, COLOR_LIGHT).result
+    assert gameboard.color_at(2, 1) is None
+
+
+def test_hash_follows_the_stones(gameboard):
+    ko(gameboard)
+    assert gameboard.hash == gameboard.zobrist.position_hash(gameboard.stones)
+
+
+def test_copy_is_independent(gameboard):
+    play(gameboard, (4, 4, COLOR_DARK))
+    other = gameboard.copy()
+    play(other, (4, 5, COLOR_LIGHT))
+    assert gameboard.color_at(4, 5) is None
+    assert gameboard.move_count == 1 and other.move_count == 2
+
+
+def test_pass(gameboard):
+    assert gameboard.pass_move(COLOR_DARK).result
+    assert not gameboard.pass_move(COLOR_DARK).result
+    assert gameboard.move_count == 1
@@ -0,0 +1,55 @@
+import threading
+import time
+import pytest
+from conftest import make_user
+from app import db, hasher
+from app.hashing import PasswordHasher, HasherBusy
+from app.models import User
+
+
+class SlowBcrypt:
+    """Stands in for Bcrypt with a hash that waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def generate_password_hash(self, password, rounds):
+        self.release.wait(5)
+        return b'$2b$04$hash'
+
+
+def test_saturated_pool_rejects_instead_of_queueing():
+    bcrypt = SlowBcrypt()
+    pool = PasswordHasher(bcrypt=bcrypt)
+    pool.max_pending = 1
+    first = threading.Thread(target=pool.hash, args=('first',))
+    first.start()
+    while pool.pending < 1:
+        time.sleep(0.001)
+    with pytest.raises(HasherBusy):
+        pool.hash('second')
+    assert pool.rejected == 1
+    bcrypt.release.set()
+    first.join()
+    assert pool.pending == 0
+    assert pool.hash('third') == '$2b$04$hash'
+
+
+def test_login_answers_busy_when_the_pool_is_full(app, monkeypatch):
+    user = make_user('player')
+    monkeypatch.setattr(hasher, 'max_pending', 0)
+    response = app.test_client().post('/login', base_url='https://localhost',
+                                      data=dict(username=user.username, password='Passw0rd!'))
+    assert response.status_code == 503
+
+
+def test_login_rehashes_a_cheaper_hash(app, login, monkeypatch):
+    user = make_user('player')
+    assert user.password.startswith('$2b$04$')
+    monkeypatch.setattr(hasher, 'rounds', 5)
+    login(user)
+    db.session.expire_all()
+    user = User.query.filter_by(username='player').one()
+    assert user.password.startswith('$2b$05$')
+    assert not user.needs_rehash()
+    login(user)
@@ -0,0 +1,27 @@
+import time
+from types import SimpleNamespace
+from conftest import make_user
+from app import identity
+
+
+def test_session_cookie_is_only_rewritten_when_due(app, login, monkeypatch):
+    now = time.time()
+    clock = SimpleNamespace(time=lambda: now)
+    monkeypatch.setattr(identity, 'time', clock)
+    client = login(make_user('player'))
+    due = app.config['SESSION_REFRESH_AFTER'].total_seconds()
+    # The first page stores the CSRF token in the session once.
+    client.get('/index', base_url='https://localhost')
+
+    clock.time = lambda: now + due - 1
+    response = client.get('/index', base_url='https://localhost')
+    assert response.status_code == 200
+    assert 'Set-Cookie' not in response.headers
+
+    clock.time = lambda: now + due
+    response = client.get('/index', base_url='https://localhost')
+    assert response.status_code == 200
+    assert response.headers['Set-Cookie'].startswith('session=')
+
+    response = client.get('/index', base_url='https://localhost')
+    assert 'Set-Cookie' not in response.headers
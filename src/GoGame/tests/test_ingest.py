@@ -0,0 +1,40 @@
+from app.models import GameRecord
+from app.movelog import decode_moves
+from app.ingest import parse_file
+
+
+def test_parse_file_rejects_only_the_malformed_game(tmp_path):
+    path = tmp_path / 'games.sgf'
+    path.write_text('(;SZ[9];B[a])(;SZ[9]PB[Ann]PW[Bob]RE[B+R];B[cc];W[dd])(;SZ[9];B[aa];W[aa])')
+    games, rejected = parse_file(str(path))
+    assert rejected == 2
+    assert len(games) == 1
+    black, white, result, size, played = games[0]
+    assert (black, white, result, size) == ('Ann', 'Bob', 'B+R', 9)
+    assert [move[:3] for move in played] == [(2, 2, 'dark'), (3, 3, 'light')]
+
+
+def test_parse_file_counts_an_unreadable_file(tmp_path):
+    assert parse_file(str(tmp_path / 'missing.sgf')) == ([], 1)
+
+
+BAD_GAMES = '(;SZ[19:19];B[aa])(;SZ[300];B[aa])(;SZ[9];B[zz])(;SZ[9];W[aa];B[aa])'
+
+
+def test_parse_file_rejects_bad_sizes_and_points(tmp_path):
+    path = tmp_path / 'games.sgf'
+    path.write_text(BAD_GAMES + '(;SZ[9];B[cc])')
+    games, rejected = parse_file(str(path))
+    assert rejected == 4
+    assert [game[3] for game in games] == [9]
+
+
+def test_import_sgf_stores_only_legal_games(app, tmp_path):
+    path = tmp_path / 'games.sgf'
+    path.write_text(BAD_GAMES + '(;SZ[9]PB[Ann]RE[B+R];B[cc];W[dd])')
+    result = app.test_cli_runner(mix_stderr=False).invoke(args=['import-sgf', str(path)])
+    assert result.exit_code == 0, result.output
+    assert result.stderr.count('Skipped a game') == 4
+    records = GameRecord.query.all()
+    assert len(records) == 1
+    assert list(decode_moves(records[0].moves)[1]) == [(2, 2, 'dark'), (3, 3, 'light')]
@@ -0,0 +1,90 @@
+import random
+from conftest import make_user, make_game
+from app import db, leaderboard
+from app.models import User, Game, RatingBucket
+
+
+def brute_rank(user):
+    return User.query.filter(User.rating > user.rating).count() + 1
+
+
+def set_ratings(users, ratings):
+    for user, rating in zip(users, ratings):
+        user.rating = rating
+    db.session.commit()
+    leaderboard.rebuild()
+
+
+def bucket_totals():
+    return {bucket.bucket: bucket.players for bucket in RatingBucket.query if bucket.players}
+
+
+def test_new_users_are_counted(app):
+    make_user('a')
+    make_user('b')
+    assert bucket_totals() == {1500: 2}
+
+
+def test_record_result(app):
+    dark, light = make_user('dark'), make_user('light')
+    leaderboard.record_result(dark, light, leaderboard.DARK_WIN)
+    db.session.commit()
+    assert (dark.win, dark.loss, light.win, light.loss) == (1, 0, 0, 1)
+    assert dark.rating == 1516 and light.rating == 1484
+    assert bucket_totals() == {1516: 1, 1484: 1}
+
+    leaderboard.record_result(dark, light, leaderboard.DRAW)
+    db.session.commit()
+    assert (dark.draw, light.draw) == (1, 1)
+    assert dark.rating < 1516 and light.rating > 1484
+    assert dark.rating + light.rating == 3000
+
+
+def test_record_result_reads_ratings_changed_elsewhere(app):
+    dark, light = make_user('dark'), make_user('light')
+    # Another game ended in the meantime and moved light's rating.
+    with db.engine.begin() as connection:
+        connection.execute(User.__table__.update().where(User.id == light.id).values(rating=1600))
+    assert light.__dict__['rating'] == 1500
+    leaderboard.record_result(dark, light, leaderboard.LIGHT_WIN)
+    db.session.commit()
+    assert 1600 < light.rating < 1616
+
+
+def test_rank_matches_a_full_count(app):
+    users = [make_user('p{}'.format(i)) for i in range(60)]
+    rng = random.Random(3)
+    set_ratings(users, [rng.choice([1500.0, 1500.5, 1499.25]) if i % 3 else rng.uniform(1200, 1800)
+                        for i in range(len(users))])
+    for user in users:
+        assert leaderboard.rank(user) == brute_rank(user)
+
+
+def test_ties_share_a_rank(app):
+    users = [make_user(name) for name in 'abcd']
+    set_ratings(users, [1600, 1550, 1550, 1500])
+    assert [position for position, _ in leaderboard.top(4)] == [1, 2, 2, 4]
+    assert [leaderboard.rank(user) for user in users] == [1, 2, 2, 4]
+
+
+def test_around_numbers_the_window(app):
+    users = [make_user('p{}'.format(i)) for i in range(30)]
+    set_ratings(users, [1400 + 10 * (i // 2) for i in range(len(users))])
+    user = users[10]
+    window = leaderboard.around(user, 3, leaderboard.rank(user))
+    assert len(window) == 7
+    assert user in [other for _, other in window]
+    assert [position for position, _ in window] == [brute_rank(other) for _, other in window]
+
+
+def test_only_players_can_stop_a_game(app, login):
+    dark, light, outsider = make_user('dark'), make_user('light'), make_user('outsider')
+    make_game('g', dark, light)
+    login(outsider).post('/stop_game/g', base_url='https://localhost')
+    assert Game.query.filter_by(gamename='g').first().completed == 0
+    assert outsider.rating == dark.rating == light.rating == 1500
+
+    login(light).post('/stop_game/g', base_url='https://localhost')
+    db.session.expire_all()
+    assert Game.query.filter_by(gamename='g').first().completed == 1
+    assert User.query.get(light.id).win == 1
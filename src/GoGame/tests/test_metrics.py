@@ -0,0 +1,24 @@
+from app import request_metrics
+
+OUTSIDE = {'REMOTE_ADDR': '203.0.113.5'}
+
+
+def test_metrics_are_served_to_allowed_addresses(app):
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert 'gogame_request_seconds' in response.get_data(as_text=True)
+
+
+def test_metrics_are_hidden_from_other_addresses(app):
+    response = app.test_client().get('/metrics', environ_base=OUTSIDE)
+    assert response.status_code == 403
+    assert 'gogame_' not in response.get_data(as_text=True)
+
+
+def test_metrics_token(app, monkeypatch):
+    monkeypatch.setattr(request_metrics, 'token', 's3cret')
+    client = app.test_client()
+    assert client.get('/metrics', environ_base=OUTSIDE,
+                      headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+    assert client.get('/metrics', environ_base=OUTSIDE,
+                      headers={'Authorization': 'Bearer guess'}).status_code == 403
@@ -0,0 +1,86 @@
+import io
+import pytest
+from conftest import make_user, make_game
+from app import db
+from app.models import GameRecord
+from app.gameboard import COLOR_DARK, COLOR_LIGHT
+from app.movelog import encode_moves, decode_moves, to_sgf, iter_sgf
+
+MOVES = [(2, 3, COLOR_DARK), (18, 18, COLOR_LIGHT), (None, None, COLOR_DARK), (0, 0, COLOR_LIGHT)]
+
+
+def test_move_log_round_trip():
+    size, moves = decode_moves(encode_moves(19, MOVES))
+    assert size == 19
+    assert list(moves) == MOVES
+
+
+def test_move_log_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_moves(b'SGF!\x01\x09')
+
+
+def test_sgf_round_trip():
+    text = to_sgf(19, MOVES, komi=6.5, black='a]b', white='c\\d', result='B+R')
+    games = list(iter_sgf(io.StringIO(text)))
+    assert len(games) == 1
+    game = games[0]
+    assert game.size == 19
+    assert game.get('KM') == '6.5'
+    assert game.get('PB') == 'a]b'
+    assert game.get('PW') == 'c\\d'
+    assert game.get('RE') == 'B+R'
+    assert game.moves == MOVES
+
+
+def test_sgf_keeps_the_main_line_only():
+    text = '(;SZ[9];B[aa](;W[bb];B[cc])(;W[dd]))(;SZ[13];B[ee])'
+    games = list(iter_sgf(io.StringIO(text)))
+    assert [game.size for game in games] == [9, 13]
+    assert games[0].moves == [(0, 0, COLOR_DARK), (1, 1, COLOR_LIGHT), (2, 2, COLOR_DARK)]
+    assert games[1].moves == [(4, 4, COLOR_DARK)]
+
+
+def test_sgf_tt_is_a_pass():
+    games = list(iter_sgf(io.StringIO('(;SZ[9];B[tt];W[])')))
+    assert games[0].moves == [(None, None, COLOR_DARK), (None, None, COLOR_LIGHT)]
+
+
+@pytest.mark.parametrize('point', ['a', 'abc', 'a1', 'A', '1a'])
+def test_malformed_moves_mark_only_their_game(point):
+    text = '(;SZ[9];B[{}];W[bb])(;SZ[9];B[cc])'.format(point)
+    games = list(iter_sgf(io.StringIO(text)))
+    assert len(games) == 2
+    assert games[0].error is not None
+    assert games[1].error is None
+    assert games[1].moves == [(2, 2, COLOR_DARK)]
+
+
+def test_unsupported_size_marks_only_its_game():
+    games = list(iter_sgf(io.StringIO('(;SZ[19:19];B[aa])(;SZ[9];B[cc])')))
+    assert games[0].error == 'Unsupported SGF board size [19:19]'
+    assert games[1].error is None and games[1].size == 9
+
+
+def test_truncated_input_yields_nothing():
+    assert list(iter_sgf(io.StringIO('(;SZ[9];B[aa];W[b'))) == []
+
+
+def test_compacted_games_list_their_moves(app, login):
+    dark, light = make_user('dark'), make_user('light')
+    game = make_game('g', dark, light)
+    game.completed = 1
+    moves = [(2, 2, COLOR_DARK), (3, 3, COLOR_LIGHT), (None, None, COLOR_DARK)]
+    db.session.add(GameRecord(game_id=game.id, size=9, move_count=3, moves=encode_moves(9, moves), compacted=1))
+    db.session.commit()
+    app.config['MOVES_PAGE_SIZE'] = 2
+    client = login(dark)
+
+    page = client.get('/show_moves/g', base_url='https://localhost').get_data(as_text=True)
+    assert '(2, 2)' in page and '(3, 3)' in page and 'Passes' not in page
+    assert page.count('<td ALIGN="center">Moves</td>') == 2
+    assert 'after=2' in page
+
+    page = client.get('/show_moves/g?after=2', base_url='https://localhost').get_data(as_text=True)
+    assert 'Passes' in page and '(2, 2)' not in page
+    assert 'Next page' not in page
@@ -0,0 +1,73 @@
+import json
+import pytest
+from app.notify import GameBroadcast, MoveNotifier, Subscription, StreamLimitReached, RELOAD
+
+
+def move(seq):
+    return json.dumps({'seq': seq})
+
+
+@pytest.fixture
+def broadcast():
+    """A broadcast that has seen moves 1 to 6 and still holds 3 to 6."""
+
+    broadcast = GameBroadcast(1, replay_size=4)
+    for seq in range(1, 7):
+        broadcast.deliver(move(seq))
+    return broadcast
+
+
+def ids(events):
+    return [event_id for event_id, _ in events]
+
+
+def test_fresh_streams_replay_nothing(broadcast):
+    assert broadcast.missed(None) == []
+
+
+def test_replay_from_an_id_inside_the_buffer(broadcast):
+    assert ids(broadcast.missed('4')) == ['5', '6']
+    assert broadcast.missed('6') == []
+
+
+def test_replay_from_the_move_just_before_the_buffer(broadcast):
+    assert ids(broadcast.missed('2')) == ['3', '4', '5', '6']
+
+
+def test_reload_once_the_id_fell_out_of_the_buffer(broadcast):
+    assert broadcast.missed('1') == [RELOAD]
+    assert broadcast.missed('bogus') == [RELOAD]
+
+
+def test_game_over_has_its_own_id(broadcast):
+    broadcast.deliver('Gameover;dark')
+    assert ids(broadcast.missed('6')) == ['end']
+    assert broadcast.missed('end') == []
+
+
+def test_full_inbox_turns_into_reload():
+    subscription = Subscription(MoveNotifier(), 1, maxsize=2)
+    for seq in range(1, 4):
+        subscription.put((str(seq), move(seq)))
+    assert subscription.get(timeout=0) is RELOAD
+    assert subscription.get(timeout=0) is None
+
+
+def test_subscribers_get_live_moves_after_the_missed_ones():
+    notifier = MoveNotifier()
+    with notifier.subscribe(1) as early:
+        notifier.publish(1, move(1))
+        notifier.publish(1, move(2))
+        with notifier.subscribe(1, last_event_id='1') as late:
+            notifier.publish(1, move(3))
+            assert [late.get(timeout=0)[0] for _ in range(2)] == ['2', '3']
+        assert [early.get(timeout=0)[0] for _ in range(3)] == ['1', '2', '3']
+
+
+def test_stream_limit():
+    notifier = MoveNotifier()
+    notifier.max_subscribers = 1
+    with notifier.subscribe(1):
+        with pytest.raises(StreamLimitReached):
+            notifier.subscribe(1)
+    notifier.subscribe(1).close()
@@ -0,0 +1,100 @@
+import json
+from conftest import make_user, make_game
+from app import db, notifier
+from app.models import GameMove
+from app.play import play_move, live_board
+
+
+def board_view(gameboard):
+    return gameboard.move_count
+
+
+def stone_rows(game):
+    return GameMove.query.filter(GameMove.game_id == game.id, GameMove.color.isnot(None)).count()
+
+
+def test_players_alternate(app):
+    dark, light = make_user('dark'), make_user('light')
+    game = make_game('g', dark, light)
+    assert play_move(game, dark, 2, 2, board_view)[0].result
+    assert not play_move(game, dark, 3, 3, board_view)[0].result
+    move, seq = play_move(game, light, 3, 3, board_view)
+    assert move.result and seq == 2
+    assert stone_rows(game) == 2
+
+
+def test_outsider_cannot_move(app):
+    dark, light, outsider = make_user('dark'), make_user('light'), make_user('outsider')
+    game = make_game('g', dark, light)
+    play_move(game, dark, 2, 2, board_view)
+    move, seq = play_move(game, outsider, 3, 3, board_view)
+    assert move.error == 'You are not playing in this game!'
+    assert seq == 1
+    assert stone_rows(game) == 1
+
+
+def test_no_moves_before_an_opponent_joins(app):
+    dark = make_user('dark')
+    game = make_game('g', dark)
+    move, _ = play_move(game, dark, 2, 2, board_view)
+    assert move.error == 'Wait for an opponent to join!'
+    assert stone_rows(game) == 0
+
+
+def test_no_moves_after_the_game_ended(app):
+    dark, light = make_user('dark'), make_user('light')
+    game = make_game('g', dark, light)
+    game.completed = 1
+    db.session.commit()
+    assert play_move(game, dark, 2, 2, board_view)[0].error == 'This game is over!'
+
+
+def test_board_is_reloaded_after_moves_stored_elsewhere(app):
+    dark, light = make_user('dark'), make_user('light')
+    game = make_game('g', dark, light)
+    play_move(game, dark, 2, 2, board_view)
+    # Another worker stores light's reply; this worker's cached board has not seen it.
+    db.session.add(GameMove(game_id=game.id, turn_player_id=light.id, turn_player_name=light.username,
+                            player_action='Moves', x_coor=3, y_coor=3, color='light', seq=2))
+    db.session.commit()
+    assert play_move(game, light, 3, 3, board_view)[0].error == 'It is not your turn!'
+    move, seq = play_move(game, dark, 3, 3, board_view)
+    assert move.error == 'This point is already taken!'
+    assert seq == 2
+    with live_board(game.id) as gameboard:
+        assert gameboard.color_at(3, 3) == 'light'
+
+
+def test_move_racing_another_worker_is_retried_on_the_stored_board(app, monkeypatch):
+    dark, light = make_user('dark'), make_user('light')
+    game = make_game('g', dark, light)
+    play_move(game, dark, 2, 2, board_view)
+    # Another worker commits light's reply after this worker's version check has passed.
+    stale = GameMove.latest_id(game.id)
+    monkeypatch.setattr(GameMove, 'latest_id', classmethod(lambda cls, game_id: stale))
+    db.session.add(GameMove(game_id=game.id, turn_player_id=light.id, turn_player_name=light.username,
+                            player_action='Moves', x_coor=3, y_coor=3, color='light', seq=2))
+    db.session.commit()
+
+    move, seq = play_move(game, light, 4, 4, board_view)
+    assert move.error == 'It is not your turn!'
+    assert seq == 2
+    move, seq = play_move(game, dark, 4, 4, board_view)
+    assert move.result and seq == 3
+    rows = GameMove.query.filter(GameMove.game_id == game.id, GameMove.color.isnot(None)).order_by(GameMove.id)
+    assert [(gm.seq, gm.color, gm.x_coor) for gm in rows] == [(1, 'dark', 2), (2, 'light', 3), (3, 'dark', 4)]
+
+
+def test_streams_get_move_deltas(app):
+    dark, light = make_user('dark'), make_user('light')
+    game = make_game('g', dark, light)
+    with notifier.subscribe(game.id) as subscription:
+        for user, x, y in [(dark, 0, 1), (light, 0, 0), (dark, 1, 0)]:
+            assert play_move(game, user, x, y, board_view)[0].result
+        events = [subscription.get(timeout=1) for _ in range(3)]
+    assert [event_id for event_id, _ in events] == ['1', '2', '3']
+    delta = json.loads(events[2][1])
+    assert delta['seq'] == 3
+    assert delta['placed'] == [{'x': 1, 'y': 0, 'color': 'dark'}]
+    assert delta['captured'] == [{'x': 0, 'y': 0}]
+    assert delta['turn'] == 'light'
@@ -0,0 +1,46 @@
+from app import db, leaderboard
+from app.models import User, Game, GameMove, RatingBucket
+
+# The user, game and game_move tables as deployed before ratings, position
+# hashes and the lookup indexes existed.
+OLD_SCHEMA = [
+    'CREATE TABLE user (id INTEGER NOT NULL, username VARCHAR(64) NOT NULL, email VARCHAR(120) NOT NULL, '
+    'password VARCHAR(128), win INTEGER, loss INTEGER, draw INTEGER, PRIMARY KEY (id))',
+    'CREATE UNIQUE INDEX ix_user_email ON user (email)',
+    'CREATE UNIQUE INDEX ix_user_username ON user (username)',
+    'CREATE TABLE game (id INTEGER NOT NULL, gamename VARCHAR NOT NULL, player1_name VARCHAR NOT NULL, '
+    'player2_name VARCHAR NOT NULL, player1_id INTEGER, player2_id INTEGER, player1_score INTEGER, '
+    'player2_score INTEGER, completed INTEGER, winner VARCHAR, PRIMARY KEY (id))',
+    'CREATE TABLE game_move (id INTEGER NOT NULL, game_id INTEGER NOT NULL, time DATETIME, '
+    'turn_player_id INTEGER NOT NULL, turn_player_name VARCHAR NOT NULL, player_action VARCHAR, '
+    'x_coor INTEGER, y_coor INTEGER, color VARCHAR, player1_move VARCHAR, player2_move VARCHAR, PRIMARY KEY (id))',
+]
+
+
+def test_create_schema_upgrades_an_old_database(app):
+    db.drop_all()
+    with db.engine.begin() as connection:
+        for statement in OLD_SCHEMA:
+            connection.execute(statement)
+        connection.execute("INSERT INTO user (username, email, password, win, loss, draw) "
+                           "VALUES ('old1', 'old1@x.org', 'x', 0, 0, 0), ('old2', 'old2@x.org', 'x', 0, 0, 0)")
+        connection.execute("INSERT INTO game (gamename, player1_name, player2_name, completed) "
+                           "VALUES ('g', 'old1', 'old2', 1), ('g', 'old2', 'Not Joined Yet', 0)")
+        connection.execute("INSERT INTO game_move (game_id, turn_player_id, turn_player_name, player_action, "
+                           "x_coor, y_coor, color) VALUES (1, 1, 'old1', 'StartGame', NULL, NULL, NULL), "
+                           "(1, 1, 'old1', 'Moves', 2, 2, 'dark'), (2, 2, 'old2', 'Moves', 4, 4, 'dark'), "
+                           "(1, 2, 'old2', 'Passes', NULL, NULL, 'light')")
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['create-schema'])
+    assert result.exit_code == 0, result.output
+    assert 'Added user.rating' in result.output
+    assert [user.rating for user in User.query] == [1500.0, 1500.0]
+    assert [(bucket.bucket, bucket.players) for bucket in RatingBucket.query] == [(1500, 2)]
+    assert leaderboard.rank(User.query.first()) == 1
+    assert [game.gamename for game in Game.query.order_by(Game.id)] == ['g', 'g-2']
+    assert [(gm.game_id, gm.seq) for gm in GameMove.query.order_by(GameMove.id)] == [(1, None), (1, 1), (2, 1), (1, 2)]
+
+    result = runner.invoke(args=['create-schema'])
+    assert result.exit_code == 0, result.output
+    assert 'Added' not in result.output
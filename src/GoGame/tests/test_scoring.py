@@ -0,0 +1,69 @@
+from conftest import play, make_user, make_game
+from app import db
+from app.models import Game
+from app.gameboard import Gameboard, COLOR_DARK, COLOR_LIGHT
+from app.scoring import score, score_batch, AREA, TERRITORY
+from app.play import play_move
+
+
+def split_board(size=9):
+    """Dark walls off the three left columns, light the three right ones."""
+
+    gameboard = Gameboard.build(size)
+    for y in range(size):
+        play(gameboard, (3, y, COLOR_DARK), (5, y, COLOR_LIGHT))
+    return gameboard
+
+
+def test_empty_board_is_nobodys():
+    final = score(Gameboard.build(9), komi=6.5)
+    assert (final.dark, final.light) == (0, 0)
+    assert final.winner == COLOR_LIGHT
+
+
+def test_area_counts_stones_and_surrounded_points():
+    final = score(split_board(), komi=0.5, rules=AREA)
+    assert final.dark_territory == 27
+    assert final.light_territory == 27
+    assert final.dark == final.light == 36
+    assert final.margin == -0.5
+    assert final.winner == COLOR_LIGHT
+
+
+def test_territory_counts_captures():
+    gameboard = split_board()
+    play(gameboard, (8, 8, COLOR_DARK), (8, 7, COLOR_LIGHT), (7, 8, COLOR_LIGHT))
+    final = score(gameboard, komi=0, rules=TERRITORY)
+    assert final.light_captures == 1
+    assert final.light == 25 + 1
+    assert final.dark == 27
+    assert final.winner == COLOR_DARK
+
+
+def test_draw_has_no_winner():
+    assert score(split_board(), komi=0).winner is None
+
+
+def test_batch_matches_single_scores_across_sizes():
+    boards = [split_board(9), Gameboard.build(13), split_board(9)]
+    play(boards[2], (0, 0, COLOR_LIGHT))
+    batch = score_batch(boards)
+    for gameboard, final in zip(boards, batch):
+        single = score(gameboard)
+        assert (final.dark, final.light) == (single.dark, single.light)
+    # Dead stones are not detected: one light stone makes dark's region neutral.
+    assert batch[2].dark_territory == 0
+
+
+def test_rescore_keeps_draws_without_a_winner(app):
+    dark, light = make_user('dark'), make_user('light')
+    drawn, won = make_game('drawn', dark, light), make_game('won', dark, light)
+    assert play_move(won, dark, 4, 4, lambda gameboard: None)[0].result
+    drawn.completed = won.completed = 1
+    drawn.winner = won.winner = 'stale'
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['rescore', '--komi', '0', '--rules', 'area'])
+    assert result.exit_code == 0, result.output
+    winners = dict(db.session.query(Game.gamename, Game.winner))
+    assert winners == {'drawn': "", 'won': 'dark'}
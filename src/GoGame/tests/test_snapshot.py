@@ -0,0 +1,31 @@
+import pytest
+from conftest import play
+from app.gameboard import COLOR_DARK, COLOR_LIGHT
+from app.snapshot import dump_board, load_board, FORMATS
+
+
+@pytest.mark.parametrize('fmt', sorted(FORMATS))
+def test_round_trip(gameboard, fmt):
+    play(gameboard, (0, 0, COLOR_LIGHT), (1, 0, COLOR_DARK), (0, 1, COLOR_DARK), (8, 8, COLOR_LIGHT))
+    loaded = load_board(dump_board(gameboard, fmt), fmt, gameboard.history)
+    assert loaded.size == gameboard.size
+    assert loaded.stones == gameboard.stones
+    assert loaded.captures == gameboard.captures
+    assert loaded.last_move == COLOR_LIGHT
+    assert loaded.move_count == gameboard.move_count
+    assert loaded.hash == gameboard.hash
+    assert loaded.liberties(8, 8) == 2
+
+
+def test_round_trip_keeps_superko_history(gameboard):
+    play(gameboard, (1, 0, COLOR_DARK), (0, 1, COLOR_DARK), (1, 2, COLOR_DARK),
+         (2, 0, COLOR_LIGHT), (3, 1, COLOR_LIGHT), (2, 2, COLOR_LIGHT), (1, 1, COLOR_LIGHT), (2, 1, COLOR_DARK))
+    loaded = load_board(dump_board(gameboard), history=gameboard.history)
+    assert not loaded.place(1, 1, COLOR_LIGHT).result
+
+
+def test_unknown_version_is_rejected(gameboard):
+    data = bytearray(dump_board(gameboard))
+    data[0] = 99
+    with pytest.raises(ValueError):
+        load_board(bytes(data))
@@ -0,0 +1,24 @@
+import shutil
+from app import db, storage
+from app.models import Game
+
+
+def test_replica_rows_are_read_from_the_replica(app, tmp_path):
+    db.session.add(Game(gamename='shared'))
+    db.session.commit()
+    replica = tmp_path / 'replica.db'
+    shutil.copy(str(tmp_path / 'game.db'), str(replica))
+    app.config['DATABASE_REPLICA_URLS'] = ['sqlite:///' + str(replica)]
+
+    reader = storage.reader()
+    reader.add(Game(gamename='replica-only'))
+    reader.commit()
+
+    assert str(reader.get_bind(Game.__mapper__).url).endswith('replica.db')
+    assert storage.query(Game).filter_by(gamename='replica-only').first() is not None
+    assert Game.query.filter_by(gamename='replica-only').first() is None
+    assert storage.query(Game).filter_by(gamename='shared').first() is not None
+
+
+def test_reader_is_the_primary_without_replicas(app):
+    assert storage.reader() is db.session